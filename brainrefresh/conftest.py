@@ -1,5 +1,6 @@
 import pytest
 
+from brainrefresh.questions.cache import page_cache
 from brainrefresh.questions.tests.factories import (
     Answer,
     AnswerFactory,
@@ -19,6 +20,13 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def local_page_cache():
+    """Process local pages and versions outlive the cache backend of a test"""
+    yield
+    page_cache.clear()
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
@@ -1,25 +1,30 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import Answer, Choice, Question, Tag
+from .models import Answer, Choice, Question, Review, Tag
+from .services import update_questions_is_published
 
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     fieldsets = ((None, {"fields": (("label", "slug"))}),)
     list_display = ("label", "slug", "question_count")
+    # required by QuestionAdmin.autocomplete_fields
+    search_fields = ["label", "slug"]
 
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.prefetch_related("questions")
+    def get_search_results(self, request, queryset, search_term):
+        """Trigram matching of the API autocomplete instead of icontains"""
+        if not search_term.strip():
+            return queryset, False
+        return queryset.matching(search_term.strip()), False
 
 
 def make_published(modeladmin, request, qs):
-    qs.update(is_published=True)
+    update_questions_is_published(qs, True)
 
 
 def make_unpublished(modeladmin, request, qs):
-    qs.update(is_published=False)
+    update_questions_is_published(qs, False)
 
 
 def update_lang_ru(modeladmin, request, qs):
@@ -71,7 +76,7 @@ class QuestionAdmin(admin.ModelAdmin):
         "updated_at",
         "created_at",
     ]
-    filter_horizontal = ["tags"]
+    autocomplete_fields = ["tags"]
 
 
 @admin.register(Choice)
@@ -115,3 +120,10 @@ class AnswerAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related("user", "question")
+
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "ease", "interval", "repetitions", "due_at")
+    list_select_related = ["question", "user"]
+    raw_id_fields = ["user", "question"]
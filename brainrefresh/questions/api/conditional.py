@@ -0,0 +1,106 @@
+"""Conditional GET (ETag / Last-Modified) for viewset methods.
+
+The state of a page is computed by the cheap `view.get_condition()` before
+the response is served from the cache or serialized - the cache versions of
+the scopes the page depends on, read once per request and shared with
+`cache_page_versioned`. Every write bumps the versions of its scopes,
+deletions included, and versions carry the time they were bumped. Without
+versions, e.g. with DummyCache, the state comes from an aggregate query.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.viewsets import GenericViewSet
+
+from ..cache import get_modified_at, get_request_versions
+
+
+def make_etag(*parts) -> str:
+    return hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def conditional(view_method):
+    """Answer conditional GETs with 304 Not Modified before `view_method` runs.
+
+    `view.get_condition(request, *args, **kwargs)` returns an ETag and a last
+    modified unix time, which may be None.
+    """
+
+    @wraps(view_method)
+    def _wrapped_view(self, request, *args, **kwargs):
+        etag, last_modified = self.get_condition(request, *args, **kwargs)
+        response = get_conditional_response(
+            request, etag=quote_etag(etag), last_modified=last_modified
+        )
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+        # stale pages served during a rebuild don't show the current state
+        stale = getattr(response, "is_stale", False)
+        if response.status_code in (200, 304) and not stale:
+            response.headers["ETag"] = quote_etag(etag)
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified)
+        return response
+
+    return _wrapped_view
+
+
+class ConditionalMixin(GenericViewSet):
+    """ETag and Last-Modified of list and detail pages for `conditional`.
+
+    Both come from the versions of `condition_scopes` of the action, the ETag
+    also covers the full url and the negotiated media type. Without versions
+    they come from the row counts and the latest `updated_at` of the page
+    queryset and of its `condition_related` relations of the action.
+    """
+
+    condition_scopes: dict[str, list[str]] = {}
+    condition_related: dict[str, list[str]] = {}
+
+    def validate_lookup(self, kwargs) -> None:
+        """Raise 404 for malformed lookup values, e.g. an invalid uuid"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg not in kwargs:
+            return
+        field = self.get_queryset().model._meta.get_field(self.lookup_field)
+        try:
+            field.to_python(kwargs[lookup_url_kwarg])
+        except ValidationError:
+            raise Http404
+
+    def get_queryset_state(self, kwargs) -> tuple[list, int | None]:
+        """Row counts and the latest `updated_at` of the page, one query"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in kwargs:
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        aggregates = {"count": Count("pk", distinct=True), "updated": Max("updated_at")}
+        for name in self.condition_related.get(self.action, []):
+            aggregates[f"{name}_count"] = Count(name, distinct=True)
+            aggregates[f"{name}_updated"] = Max(f"{name}__updated_at")
+        state = queryset.order_by().aggregate(**aggregates)
+        updated = [
+            int(value.timestamp())
+            for key, value in state.items()
+            if key.endswith("updated") and value is not None
+        ]
+        return [state[key] for key in sorted(state)], max(updated, default=None)
+
+    def get_condition(self, request, *args, **kwargs) -> tuple[str, int | None]:
+        self.validate_lookup(kwargs)
+        scopes = [
+            scope.format(**kwargs)
+            for scope in self.condition_scopes.get(self.action, [])
+        ]
+        versions = get_request_versions(request, scopes)
+        if scopes and all(versions):
+            state, last_modified = versions, get_modified_at(versions)
+        else:
+            state, last_modified = self.get_queryset_state(kwargs)
+        etag = make_etag(*state, request.get_full_path(), request.accepted_media_type)
+        return etag, last_modified
@@ -0,0 +1,90 @@
+"""Sparse fieldsets selected with `?fields=` and `?omit=` of GET requests.
+
+Both take comma separated field names, dotted names select nested fields,
+e.g. `?fields=uuid,title,tags.slug` or `?omit=creator,tags.url`.
+"""
+from functools import cached_property
+
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        name=FIELDS_PARAM,
+        type=str,
+        description="Comma separated fields to return, e.g. `uuid,tags.slug`",
+        required=False,
+    ),
+    OpenApiParameter(
+        name=OMIT_PARAM,
+        type=str,
+        description="Comma separated fields to skip, e.g. `creator,tags.url`",
+        required=False,
+    ),
+]
+
+
+def _parse(value: str) -> set[tuple[str, ...]]:
+    return {tuple(name.strip().split(".")) for name in value.split(",") if name.strip()}
+
+
+class Fieldset:
+    """Requested fields of one serializer level, all fields by default"""
+
+    def __init__(self, fields=None, omit=()):
+        self.fields = None if fields is None else set(fields)
+        self.omit = set(omit)
+
+    @classmethod
+    def from_request(cls, request) -> "Fieldset":
+        # write requests keep every field for validation
+        if request is None or request.method not in ("GET", "HEAD"):
+            return cls()
+        params = request.query_params if hasattr(request, "query_params") else {}
+        fields = params.get(FIELDS_PARAM)
+        return cls(
+            _parse(fields) if fields else None,
+            _parse(params.get(OMIT_PARAM, "")),
+        )
+
+    def wants(self, name: str) -> bool:
+        if (name,) in self.omit:
+            return False
+        return self.fields is None or any(path[0] == name for path in self.fields)
+
+    def prune(self, data: dict) -> dict:
+        return {name: value for name, value in data.items() if self.wants(name)}
+
+    def nested(self, name: str) -> "Fieldset":
+        """Fieldset of the nested `name` field"""
+        fields = None
+        if self.fields is not None and (name,) not in self.fields:
+            fields = {path[1:] for path in self.fields if path[0] == name}
+        omit = {path[1:] for path in self.omit if path[0] == name and len(path) > 1}
+        return Fieldset(fields, omit)
+
+
+class SparseFieldsetMixin(serializers.Serializer):
+    """Serializer mixin pruning fields by the fieldset of the request"""
+
+    @cached_property
+    def fieldset(self) -> Fieldset:
+        names: list[str] = []
+        serializer: serializers.BaseSerializer = self
+        while serializer.parent is not None:
+            # children of list serializers have no field name
+            if serializer.field_name:
+                names.append(serializer.field_name)
+            serializer = serializer.parent
+        fieldset = Fieldset.from_request(serializer.context.get("request"))
+        for name in reversed(names):
+            fieldset = fieldset.nested(name)
+        return fieldset
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.fieldset
+        return {name: field for name, field in fields.items() if fieldset.wants(name)}
@@ -1,39 +1,215 @@
+import hashlib
 from collections import OrderedDict
+from typing import Any
 
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.pagination import CursorPagination as _CursorPagination
 from rest_framework.pagination import LimitOffsetPagination as _LimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_planner_count_estimate(queryset) -> int | None:
+    """Row count estimated by the PostgreSQL planner, None for other databases"""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class LimitOffsetPagination(_LimitOffsetPagination):
+    """Limit/offset pagination with optional count, controlled by `?count=`:
+
+    - `true` (default) - exact COUNT(*)
+    - `false` - count is skipped
+    - `estimated` - cached count or planner estimate, exact for small results
+    """
+
     default_limit = 20
     max_limit = 50
+    count_query_param = "count"
+    count_modes = ("true", "false", "estimated")
+    # exact count is cheap below this amount of estimated rows
+    exact_count_threshold = 1000
+    estimated_count_cache_time = 60 * 5
+
+    count_type = None
+    has_next = None
+
+    def get_count_mode(self, request) -> str:
+        mode = request.query_params.get(self.count_query_param, "").lower()
+        return mode if mode in self.count_modes else "true"
+
+    def get_estimated_count(self, queryset) -> tuple[int, str]:
+        """Return count with its type - `exact` or `estimated`"""
+        sql, params = queryset.query.sql_with_params()
+        key_hash = hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+        cache_key = f"pagination:count:{key_hash}"
+        count = cache.get(cache_key)
+        if count is not None:
+            return count, "estimated"
+        count = get_planner_count_estimate(queryset)
+        if count is None or count < self.exact_count_threshold:
+            count, count_type = self.get_count(queryset), "exact"
+        else:
+            count_type = "estimated"
+        cache.set(cache_key, count, self.estimated_count_cache_time)
+        return count, count_type
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.count_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        match self.get_count_mode(request):
+            case "true":
+                self.count, self.count_type = self.get_count(queryset), "exact"
+            case "false":
+                self.count = None
+            case "estimated":
+                self.count, self.count_type = self.get_estimated_count(queryset)
+        # fetch one extra row to find out if there is a next page
+        start, stop = self.offset, self.offset + self.limit + 1
+        results = list(queryset[start:stop])
+        self.has_next = len(results) > self.limit
+        return results[: self.limit]
+
+    def get_next_link(self):
+        if self.has_next is None:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        assert self.request is not None
+        assert self.limit is not None and self.offset is not None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        offset = self.offset + self.limit
+        return replace_query_param(url, self.offset_query_param, offset)
 
     def get_paginated_data(self, data):
-        return OrderedDict(
+        paginated_data: OrderedDict[str, Any] = OrderedDict(
             [
                 ("limit", self.limit),
                 ("offset", self.offset),
                 ("count", self.count),
-                ("next", self.get_next_link()),
-                ("previous", self.get_previous_link()),
-                ("results", data),
             ]
         )
+        if self.has_next is not None:
+            # count mode was requested explicitly
+            paginated_data["count_type"] = self.count_type
+        paginated_data.update(
+            next=self.get_next_link(),
+            previous=self.get_previous_link(),
+            results=data,
+        )
+        return paginated_data
 
     def get_paginated_response(self, data):
         """
         We redefine this method in order to return `limit` and `offset`.
         This is used by the frontend to construct the pagination itself.
         """
+        return Response(self.get_paginated_data(data))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Count mode: exact, skipped or estimated.",
+                "schema": {"type": "string", "enum": list(self.count_modes)},
+            },
+        ]
+
+
+class CursorPagination(_CursorPagination):
+    """Keyset pagination without COUNT(*) and OFFSET scans.
+
+    Positions are taken from the first ordering field only, rows sharing its
+    value are skipped with an offset. It should be unchanging and close to
+    unique, like `created_at`; the next fields just make the order stable.
+    """
+
+    page_size = LimitOffsetPagination.default_limit
+    page_size_query_param = "limit"
+    max_page_size = LimitOffsetPagination.max_limit
+    ordering = ("-created_at", "-id")
+
+    def get_paginated_response(self, data):
+        """`offset` and `count` have no meaning with cursors, only `limit` is kept"""
         return Response(
             OrderedDict(
                 [
-                    ("limit", self.limit),
-                    ("offset", self.offset),
-                    ("count", self.count),
+                    ("limit", self.page_size),
                     ("next", self.get_next_link()),
                     ("previous", self.get_previous_link()),
                     ("results", data),
                 ]
             )
         )
+
+
+class AnswerCursorPagination(CursorPagination):
+    ordering = ("-updated_at", "-id")
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """Limit/offset pagination, switched to cursor mode with `?pagination=cursor`.
+
+    Links of cursor pages carry the `cursor` param, which keeps the mode on.
+    """
+
+    mode_query_param = "pagination"
+    cursor_pagination_class = CursorPagination
+    cursor_paginator = None
+
+    def use_cursor(self, request) -> bool:
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        cursor_paginator = self.cursor_pagination_class()
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `cursor` to use keyset pagination.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            *[
+                parameter
+                for parameter in cursor_paginator.get_schema_operation_parameters(view)
+                if parameter["name"] == cursor_paginator.cursor_query_param
+            ],
+        ]
+
+
+class AnswerPagination(LimitOffsetOrCursorPagination):
+    cursor_pagination_class = AnswerCursorPagination
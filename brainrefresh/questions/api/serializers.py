@@ -1,23 +1,39 @@
+from functools import cached_property
+
 from django.db import transaction
-from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from ..models import Answer, Choice, Question, Tag
-from .validators import compare_users_and_restrict, validate_two_uuids
+from ..importer import FORMATS, get_format
+from ..managers import headline_to_html
+from ..models import Answer, Choice, LanguageStats, Question, Review, Tag, TagStats
+from ..services import grade_answer, record_review, set_question_choices
+from .fieldsets import Fieldset, SparseFieldsetMixin
+from .validators import (
+    compare_users_and_restrict,
+    validate_choice_uuids,
+    validate_unanswered_choices,
+    validate_unique_choice_uuids,
+)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ["url", "label", "slug", "question_count"]
         extra_kwargs = {"url": {"view_name": "api:tag-detail", "lookup_field": "slug"}}
 
 
-class QuestionBaseSerializer(serializers.ModelSerializer):
-    class TagsSerializer(serializers.Serializer):
+class TagAutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class QuestionBaseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class TagsSerializer(SparseFieldsetMixin, serializers.Serializer):
         url = serializers.HyperlinkedIdentityField(
             view_name="api:tag-detail", lookup_field="slug"
         )
@@ -53,46 +69,204 @@ class QuestionBaseSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation["creator"] = self.CreatorSerializer(instance.user).data
+        if self.fieldset.wants("creator"):
+            creator = self.CreatorSerializer(instance.user).data
+            representation["creator"] = self.fieldset.nested("creator").prune(creator)
+        return representation
+
+
+class QuestionValuesListSerializer(serializers.ListSerializer):
+    child: "QuestionListValuesSerializer"
+
+    def to_representation(self, data):
+        rows = list(data)
+        self.child.prepare(rows)
+        return [self.child.to_representation(row) for row in rows]
+
+
+class QuestionListValuesSerializer(serializers.BaseSerializer):
+    """Read-only QuestionListSerializer for `values()` rows of list pages.
+
+    Tags of a page are fetched in one query and urls are built from
+    precomputed prefixes, the output is identical to QuestionListSerializer.
+    Use with `many=True`.
+    """
+
+    class Meta:
+        list_serializer_class = QuestionValuesListSerializer
+
+    values_fields = [
+        "id",
+        "uuid",
+        "title",
+        "language",
+        "is_multichoice",
+        "updated_at",
+        "created_at",
+        "user__username",
+        "user__name",
+    ]
+    url_placeholder = "__placeholder__"
+    datetime_field = serializers.DateTimeField()
+
+    # set by `prepare`
+    question_url: str
+    tag_url: str
+    tags_by_question: dict[int, list[dict]]
+
+    @classmethod
+    def get_values_fields(cls, fieldset: Fieldset) -> list[str]:
+        """`values_fields` without the joins of skipped fields"""
+        skipped = (
+            set() if fieldset.wants("creator") else {"user__username", "user__name"}
+        )
+        return [field for field in cls.values_fields if field not in skipped]
+
+    @cached_property
+    def fieldset(self) -> Fieldset:
+        return Fieldset.from_request(self.context.get("request"))
+
+    def get_url_template(self, view_name: str, lookup_field: str) -> str:
+        request = self.context["request"]
+        url = reverse(view_name, kwargs={lookup_field: self.url_placeholder})
+        return request.build_absolute_uri(url)
+
+    def prepare(self, rows: list[dict]) -> None:
+        """Build url templates and fetch tags of `rows`"""
+        self.question_url = self.get_url_template("api:question-detail", "uuid")
+        self.tag_url = self.get_url_template("api:tag-detail", "slug")
+        self.tags_by_question = {}
+        if not self.fieldset.wants("tags"):
+            return
+        tag_fieldset = self.fieldset.nested("tags")
+        tag_fields = [
+            name for name in ["url", "label", "slug"] if tag_fieldset.wants(name)
+        ]
+        QuestionTag = Question.tags.through
+        question_tags = (
+            QuestionTag.objects.filter(question_id__in=[row["id"] for row in rows])
+            .order_by(*[f"tag__{field}" for field in Tag._meta.ordering or []])
+            .values_list("question_id", "tag__label", "tag__slug")
+        )
+        for question_id, label, slug in question_tags:
+            tag = {
+                "url": self.tag_url.replace(self.url_placeholder, slug),
+                "label": label,
+                "slug": slug,
+            }
+            self.tags_by_question.setdefault(question_id, []).append(
+                {name: tag[name] for name in tag_fields}
+            )
+
+    def to_representation(self, row):
+        uuid = str(row["uuid"])
+        representation = {
+            "url": self.question_url.replace(self.url_placeholder, uuid),
+            "uuid": uuid,
+            "title": row["title"],
+            "language": row["language"],
+            "is_multichoice": row["is_multichoice"],
+            "updated_at": self.datetime_field.to_representation(row["updated_at"]),
+            "created_at": self.datetime_field.to_representation(row["created_at"]),
+            "tags": self.tags_by_question.get(row["id"], []),
+            "creator": {
+                "username": row.get("user__username"),
+                "name": row.get("user__name"),
+            },
+        }
+        fieldset = self.fieldset
+        if fieldset.fields is None and not fieldset.omit:
+            return representation
+        representation = fieldset.prune(representation)
+        if "creator" in representation:
+            creator = representation["creator"]
+            representation["creator"] = fieldset.nested("creator").prune(creator)
         return representation
 
 
+class QuestionDetailChoicesSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Choice
+        fields = [
+            "url",
+            "uuid",
+            "text",
+            "is_correct",
+        ]
+        extra_kwargs = {
+            "is_correct": {"write_only": True},
+        }
+
+    url = serializers.HyperlinkedIdentityField(
+        view_name="api:choice-detail", lookup_field="uuid"
+    )
+    # identifies an existing choice on update
+    uuid = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        # text is optional only for existing choices of a partial update
+        if "uuid" not in attrs and "text" not in attrs:
+            raise serializers.ValidationError({"text": [_("This field is required.")]})
+        return attrs
+
+
 class QuestionListSerializer(QuestionBaseSerializer):
     class Meta:
         model = QuestionBaseSerializer.Meta.model
-        fields = QuestionBaseSerializer.Meta.fields
+        fields = QuestionBaseSerializer.Meta.fields + ["choices"]
         extra_kwargs = {
             "text": {"write_only": True},
             "explanation": {"write_only": True},
         }
 
+    choices = QuestionDetailChoicesSerializer(
+        many=True, required=False, write_only=True
+    )
+
+    def validate_choices(self, choices_data):
+        validate_unique_choice_uuids(choices_data)
+        return choices_data
+
+    @transaction.atomic()
     def create(self, validated_data):
-        # pop tags
+        # pop tags and choices
         tags_data = validated_data.pop("tags", [])
         tag_slugs = [tag["slug"] for tag in tags_data if "slug" in tag]
+        choices_data = validated_data.pop("choices", [])
+        validate_choice_uuids(
+            [choice["uuid"] for choice in choices_data if "uuid" in choice], []
+        )
         # create question, filter tags by slugs
+        correct_count = sum(choice.get("is_correct", False) for choice in choices_data)
+        validated_data["is_multichoice"] = correct_count > 1
         question = Question.objects.create(**validated_data)
         tags = Tag.objects.filter(slug__in=tag_slugs)
         # set tags if any
         question.tags.set(tags)
+        # create choices in one statement
+        set_question_choices(question, choices_data, choices=[])
         return question
 
 
-class QuestionDetailChoicesSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Choice
-        fields = [
-            "url",
-            "uuid",
-            "text",
-            "is_correct",
-        ]
-        extra_kwargs = {
-            "is_correct": {"write_only": True},
-        }
+class QuestionSearchSerializer(QuestionListSerializer):
+    """Search result with its rank and highlighted matches"""
 
-    url = serializers.HyperlinkedIdentityField(
-        view_name="api:choice-detail", lookup_field="uuid"
+    class Meta(QuestionListSerializer.Meta):
+        fields = QuestionListSerializer.Meta.fields + ["rank", "headline"]
+
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.SerializerMethodField(
+        help_text="HTML escaped fragments with matches wrapped in <mark>."
+    )
+
+    def get_headline(self, obj) -> str:
+        return headline_to_html(obj.headline)
+
+
+class QuestionRandomQuerySerializer(serializers.Serializer):
+    n = serializers.IntegerField(min_value=1, max_value=50, default=10)
+    exclude_answered = serializers.BooleanField(
+        default=False, help_text="Skip questions answered by the current user."
     )
 
 
@@ -103,15 +277,35 @@ class QuestionDetailSerializer(QuestionBaseSerializer):
             "choices",
         ]
 
-    choices = QuestionDetailChoicesSerializer(many=True, read_only=True)
+    choices = QuestionDetailChoicesSerializer(many=True, required=False)
+
+    def validate_choices(self, choices_data):
+        validate_unique_choice_uuids(choices_data)
+        return choices_data
 
+    @transaction.atomic()
     def update(self, instance, validated_data):
         request = self.context.get("request")
         # validate users
         compare_users_and_restrict(request.user, instance.user)
-        # pop tags
+        # pop tags and choices, choices are kept as is if omitted
         tags_data = validated_data.pop("tags", [])
         tag_slugs = [tag["slug"] for tag in tags_data if "slug" in tag]
+        choices_data = validated_data.pop("choices", None)
+        if choices_data is not None:
+            # diff against existing choices with bulk queries, locked so
+            # answers can't select the deleted ones before they're gone
+            choices = list(instance.choices.select_for_update())
+            kept_uuids = [choice["uuid"] for choice in choices_data if "uuid" in choice]
+            validate_choice_uuids(kept_uuids, [choice.uuid for choice in choices])
+            validate_unanswered_choices(
+                [choice for choice in choices if choice.uuid not in kept_uuids]
+            )
+            validated_data["is_multichoice"] = set_question_choices(
+                instance, choices_data, choices=choices
+            )
+            # drop prefetched choices for the response
+            getattr(instance, "_prefetched_objects_cache", {}).pop("choices", None)
         # update question, filter tags by slugs
         question = super().update(instance, validated_data)
         tags = Tag.objects.filter(slug__in=tag_slugs)
@@ -158,8 +352,8 @@ class ChoiceSerializer(serializers.ModelSerializer):
         return choice
 
 
-class AnswerSerializer(serializers.ModelSerializer):
-    class ChoicesSerializer(serializers.Serializer):
+class AnswerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class ChoicesSerializer(SparseFieldsetMixin, serializers.Serializer):
         uuid = serializers.UUIDField()
         text = serializers.CharField(read_only=True)
         is_correct = serializers.BooleanField(read_only=True)
@@ -177,6 +371,7 @@ class AnswerSerializer(serializers.ModelSerializer):
         ]
         extra_kwargs = {
             "url": {"view_name": "api:answer-detail", "lookup_field": "uuid"},
+            "is_correct": {"read_only": True},
         }
 
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
@@ -185,15 +380,119 @@ class AnswerSerializer(serializers.ModelSerializer):
     )
     choices = ChoicesSerializer(many=True)
 
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        # graded on create - return correct choices with explanation
+        grade = self.context.get("grade")
+        if grade is not None and instance is self.instance:
+            representation.update(AnswerCheckSerializer(grade).data)
+        return representation
+
     @transaction.atomic()
     def create(self, validated_data):
         question = validated_data.pop("question")
-        choices_data = validated_data.pop("choices")
+        choice_uuids = {choice["uuid"] for choice in validated_data.pop("choices")}
+        # resolve question choices in one query, validate submitted uuids as a set
+        question_choices = list(question.choices.only("question", "uuid", "is_correct"))
+        validate_choice_uuids(
+            choice_uuids, [choice.uuid for choice in question_choices]
+        )
+        # grade answer
+        grade = grade_answer(question, choice_uuids, choices=question_choices)
+        validated_data["is_correct"] = grade.is_correct
         # create answer
         answer = Answer.objects.create(question=question, **validated_data)
-        # loop over nested choices and validate question uuids
-        for choice_data in choices_data:
-            choice = get_object_or_404(Choice, uuid=choice_data["uuid"])
-            validate_two_uuids(question.uuid, choice.question.uuid)
-            answer.choices.add(choice)
+        # insert selected choices in one statement
+        AnswerChoice = Answer.choices.through
+        AnswerChoice.objects.bulk_create(
+            AnswerChoice(answer=answer, choice_id=choice.pk)
+            for choice in question_choices
+            if choice.uuid in choice_uuids
+        )
+        record_review(answer.user, question, grade.is_correct, answer.created_at)
+        self.context["grade"] = grade
         return answer
+
+
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Review
+        fields = ["question", "ease", "interval", "repetitions", "due_at"]
+
+    question = QuestionDetailSerializer(read_only=True)
+
+
+class ReviewDueQuerySerializer(serializers.Serializer):
+    n = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class LanguageStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LanguageStats
+        fields = ["language", "attempts", "correct", "accuracy", "last_attempt_at"]
+
+    accuracy = serializers.FloatField(allow_null=True)
+
+
+class TagStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TagStats
+        fields = ["tag", "attempts", "correct", "accuracy", "last_attempt_at"]
+
+    tag = QuestionBaseSerializer.TagsSerializer()
+    accuracy = serializers.FloatField(allow_null=True)
+
+
+class UserStatsSerializer(serializers.Serializer):
+    """Answer stats of `services.get_user_stats`"""
+
+    attempts = serializers.IntegerField()
+    correct = serializers.IntegerField()
+    accuracy = serializers.FloatField(allow_null=True)
+    last_attempt_at = serializers.DateTimeField(allow_null=True)
+    languages = LanguageStatsSerializer(many=True)
+    tags = TagStatsSerializer(many=True)
+
+
+class AnswerCheckSerializer(serializers.Serializer):
+    """Grade of submitted choices, `choices` are write only"""
+
+    choices = AnswerSerializer.ChoicesSerializer(many=True, write_only=True)
+    is_correct = serializers.BooleanField(read_only=True)
+    correct_choices = serializers.ListField(
+        child=serializers.UUIDField(), read_only=True
+    )
+    explanation = serializers.CharField(read_only=True)
+
+
+class QuestionImportUploadSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="JSON Lines or CSV file.")
+    format = serializers.ChoiceField(
+        FORMATS, required=False, help_text="File format, by extension if omitted."
+    )
+
+    def validate(self, attrs):
+        attrs.setdefault("format", get_format(attrs["file"].name))
+        if attrs["format"] is None:
+            raise serializers.ValidationError({"format": ["Unknown file format."]})
+        return attrs
+
+
+class QuestionImportStatusSerializer(serializers.Serializer):
+    """Import task state, `progress` while running and `result` when finished"""
+
+    task_id = serializers.CharField()
+    status = serializers.CharField()
+    progress = serializers.DictField(required=False)
+    result = serializers.DictField(required=False)
+
+
+class CacheStatsSerializer(serializers.Serializer):
+    """Page cache counters of the process which served the request"""
+
+    pid = serializers.IntegerField()
+    local_hits = serializers.IntegerField(default=0)
+    local_misses = serializers.IntegerField(default=0)
+    local_size = serializers.IntegerField()
+    shared_hits = serializers.IntegerField(default=0)
+    shared_misses = serializers.IntegerField(default=0)
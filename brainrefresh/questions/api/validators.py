@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from uuid import UUID
 
 from django.contrib.auth import get_user_model
@@ -5,6 +6,8 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import exceptions, serializers
 from rest_framework.exceptions import PermissionDenied
 
+from ..models import Answer
+
 User = get_user_model()
 
 
@@ -44,3 +47,45 @@ def validate_two_uuids(uuid_1: UUID, uuid_2: UUID) -> None:
     """
     if uuid_1 != uuid_2:
         raise serializers.ValidationError()
+
+
+def validate_choice_uuids(choice_uuids: Iterable[UUID], valid_uuids: Iterable[UUID]):
+    """Raise error listing `choice_uuids` which are not in `valid_uuids`.
+
+    Raises:
+        serializers.ValidationError
+    """
+    invalid_uuids = set(choice_uuids) - set(valid_uuids)
+    if invalid_uuids:
+        invalid = ", ".join(sorted(str(uuid) for uuid in invalid_uuids))
+        msg = _("Choices don't belong to the question: %(invalid)s")
+        raise serializers.ValidationError({"choices": [msg % {"invalid": invalid}]})
+
+
+def validate_unanswered_choices(choices: Iterable) -> None:
+    """Raise error listing `choices` selected in answers, which can't be deleted.
+
+    Raises:
+        serializers.ValidationError
+    """
+    choice_ids = [choice.pk for choice in choices]
+    if not choice_ids:
+        return
+    answered_choices = Answer.choices.through.objects.filter(choice_id__in=choice_ids)
+    if answered_uuids := set(
+        answered_choices.values_list("choice__uuid", flat=True).distinct()
+    ):
+        answered = ", ".join(sorted(str(uuid) for uuid in answered_uuids))
+        msg = _("Choices with answers can't be deleted: %(answered)s")
+        raise serializers.ValidationError({"choices": [msg % {"answered": answered}]})
+
+
+def validate_unique_choice_uuids(choices_data: Iterable[dict]) -> None:
+    """Raise error if an existing choice is listed more than once.
+
+    Raises:
+        serializers.ValidationError
+    """
+    uuids = [choice["uuid"] for choice in choices_data if "uuid" in choice]
+    if len(uuids) != len(set(uuids)):
+        raise serializers.ValidationError([_("Choice uuids must be unique.")])
@@ -1,8 +1,18 @@
+import os
+import random
+from collections.abc import Sequence
+from typing import cast
+
 from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django_filters import rest_framework as filters
-from drf_spectacular.utils import OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotAuthenticated, ValidationError
 from rest_framework.mixins import (
     CreateModelMixin,
     DestroyModelMixin,
@@ -16,45 +26,109 @@ from rest_framework.permissions import (
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
+from rest_framework.response import Response
+from rest_framework.status import HTTP_202_ACCEPTED
 from rest_framework.viewsets import GenericViewSet
 
-from .pagination import LimitOffsetPagination
+from brainrefresh.users.models import User
+
+from ..cache import (
+    CHOICES,
+    QUESTIONS,
+    TAGS,
+    cache_page_versioned,
+    choice_scope,
+    get_cached_ids,
+    page_cache,
+    question_scope,
+    tag_scope,
+)
+from ..exporter import iter_gzip, iter_ndjson
+from ..managers import QuestionQuerySet
+from ..services import grade_answer
+from ..tasks import import_questions_task
+from .conditional import ConditionalMixin, conditional
+from .fieldsets import FIELDSET_PARAMETERS, Fieldset
+from .pagination import (
+    AnswerPagination,
+    LimitOffsetOrCursorPagination,
+    LimitOffsetPagination,
+)
 from .serializers import (
     Answer,
+    AnswerCheckSerializer,
     AnswerSerializer,
+    CacheStatsSerializer,
     Choice,
     ChoiceSerializer,
     Question,
     QuestionDetailSerializer,
+    QuestionImportStatusSerializer,
+    QuestionImportUploadSerializer,
     QuestionListSerializer,
+    QuestionListValuesSerializer,
+    QuestionRandomQuerySerializer,
+    QuestionSearchSerializer,
+    Review,
+    ReviewDueQuerySerializer,
+    ReviewSerializer,
     Tag,
+    TagAutocompleteQuerySerializer,
     TagSerializer,
 )
 from .validators import compare_users_and_restrict
 
 
-class TagViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
-    queryset = Tag.objects.prefetch_related("questions")
+@extend_schema_view(
+    list=extend_schema(parameters=FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
+class TagViewSet(ConditionalMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet):
+    queryset = Tag.objects.all()
     serializer_class = TagSerializer
     lookup_field = "slug"
+    condition_scopes = {"list": [TAGS], "retrieve": [tag_scope("{slug}")]}
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "autocomplete"]:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAdminUser]
         return [permission() for permission in permission_classes]
 
-    @method_decorator(cache_page(settings.API_CACHE_TIME))
+    @conditional
+    @method_decorator(cache_page_versioned(settings.API_CACHE_TIME, depends_on=[TAGS]))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-    @method_decorator(cache_page(settings.API_CACHE_TIME))
+    @conditional
+    @method_decorator(
+        cache_page_versioned(settings.API_CACHE_TIME, depends_on=[tag_scope("{slug}")])
+    )
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[TagAutocompleteQuerySerializer, *FIELDSET_PARAMETERS],
+        responses=TagSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request, *args, **kwargs):
+        """Top tags by similarity of label or slug to `q`, then by popularity"""
+        params = TagAutocompleteQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        tags = Tag.objects.autocomplete(
+            params.validated_data["q"], params.validated_data["limit"]
+        )
+        return Response(self.get_serializer(tags, many=True).data)
+
 
+@extend_schema_view(
+    list=extend_schema(parameters=FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
 class QuestionViewSet(
+    ConditionalMixin,
     ListModelMixin,
     CreateModelMixin,
     RetrieveModelMixin,
@@ -63,20 +137,46 @@ class QuestionViewSet(
     GenericViewSet,
 ):
     class QuestionFilter(filters.FilterSet):
+        class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+            pass
+
         user = filters.CharFilter(field_name="user__username", lookup_expr="exact")
         tag = filters.CharFilter(
-            field_name="tags__slug", lookup_expr="icontains"
-        )  # could change to ModelMultipleChoiceFilter if needed
+            method="filter_tag",
+            help_text="Fuzzy match by a part of tag slug, slower than `tags`.",
+        )
+        tags = CharInFilter(
+            method="filter_tags",
+            help_text="Comma separated tag slugs, matched exactly.",
+        )
+        tags_match = filters.ChoiceFilter(
+            choices=[("any", "any"), ("all", "all")],
+            method="filter_tags_match",
+            help_text="Match `any` (default) or `all` of `tags`.",
+        )
 
         class Meta:
             model = Question
-            fields = ["tag", "user", "language"]
+            fields = ["tag", "tags", "tags_match", "user", "language"]
+
+        def filter_tag(self, queryset, name, value):
+            return queryset.with_tag_like(value)
+
+        def filter_tags(self, queryset, name, value):
+            match_all = self.form.cleaned_data.get("tags_match") == "all"
+            return queryset.with_tags(value, match_all=match_all)
+
+        def filter_tags_match(self, queryset, name, value):
+            # applied by filter_tags
+            return queryset
 
     lookup_field = "uuid"
+    condition_scopes = {"list": [QUESTIONS], "retrieve": [question_scope("{uuid}")]}
+    condition_related = {"list": ["tags"], "retrieve": ["tags", "choices"]}
     permission_classes = (IsAuthenticatedOrReadOnly,)
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = QuestionFilter
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
     parameters = [
         OpenApiParameter(
             name="language",
@@ -87,28 +187,197 @@ class QuestionViewSet(
     ]
 
     def get_serializer_class(self):
-        if self.action in ["retrieve", "update"]:
+        if self.action in ["retrieve", "update", "partial_update", "random"]:
             return QuestionDetailSerializer
+        if self.action == "search":
+            return QuestionSearchSerializer
         return QuestionListSerializer
 
     def get_queryset(self):
-        query = Question.objects.select_related("user").prefetch_related("tags")
-        if self.action in ["retrieve", "update"]:
-            query = query.prefetch_related("choices")
+        # skip relations of fields omitted by the fieldset
+        fieldset = Fieldset.from_request(self.request)
+        query = Question.objects.all()
+        if fieldset.wants("creator"):
+            query = query.select_related("user")
+        if fieldset.wants("tags"):
+            query = query.prefetch_related("tags")
+        if self.action in ["retrieve", "update", "partial_update", "random"]:
+            if fieldset.wants("choices"):
+                query = query.prefetch_related("choices")
         return query.published()
 
-    @method_decorator(cache_page(settings.API_CACHE_TIME))
+    @conditional
+    @method_decorator(
+        cache_page_versioned(settings.API_CACHE_TIME, depends_on=[QUESTIONS])
+    )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        """Serialized from `values()` rows, skipping model instances"""
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        fieldset = Fieldset.from_request(request)
+        rows = queryset.values(
+            *QuestionListValuesSerializer.get_values_fields(fieldset)
+        )
+        page = self.paginate_queryset(rows)
+        context = self.get_serializer_context()
+        serializer = QuestionListValuesSerializer(
+            rows if page is None else page, many=True, context=context
+        )
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
-    @method_decorator(cache_page(settings.API_CACHE_TIME))
+    @conditional
+    @method_decorator(
+        cache_page_versioned(
+            settings.API_CACHE_TIME, depends_on=[question_scope("{uuid}")]
+        )
+    )
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                description='Search query, e.g. `python "list comprehension" -django`',
+                required=True,
+            ),
+            *FIELDSET_PARAMETERS,
+        ],
+    )
+    @action(detail=False, methods=["get"], pagination_class=LimitOffsetPagination)
+    def search(self, request, *args, **kwargs):
+        """Full-text search over title, text and explanation, best matches first"""
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": ["This parameter is required."]})
+        queryset = cast(QuestionQuerySet, self.filter_queryset(self.get_queryset()))
+        queryset = queryset.search(query, language=request.query_params.get("language"))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=[QuestionRandomQuerySerializer, *FIELDSET_PARAMETERS],
+        responses=QuestionDetailSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def random(self, request, *args, **kwargs):
+        """Uniform sample of `n` filtered questions with choices, in random order.
+
+        Sampled from the cached ids of the filtered questions, which are
+        refreshed with every question change.
+        """
+        params = QuestionRandomQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = self.filter_queryset(self.get_queryset())
+        ids: Sequence[int] = get_cached_ids(
+            queryset.prefetch_related(None),
+            depends_on=[QUESTIONS],
+            timeout=settings.API_CACHE_TIME,
+        )
+        if params.validated_data["exclude_answered"]:
+            if not request.user.is_authenticated:
+                raise NotAuthenticated()
+            answered = set(request.user.answers.values_list("question", flat=True))
+            ids = [pk for pk in ids if pk not in answered]
+        sampled = random.sample(ids, min(params.validated_data["n"], len(ids)))
+        questions = queryset.in_bulk(sampled)
+        serializer = self.get_serializer(
+            [questions[pk] for pk in sampled if pk in questions], many=True
+        )
+        return Response(serializer.data)
+
     def perform_destroy(self, instance):
         compare_users_and_restrict(self.request.user, instance.user, call_from="view")
         instance.delete()
 
+    @extend_schema(request=AnswerCheckSerializer, responses=AnswerCheckSerializer)
+    @action(detail=True, methods=["post"], permission_classes=[AllowAny])
+    def check(self, request, *args, **kwargs):
+        """Grade choices without saving an Answer"""
+        question = self.get_object()
+        serializer = AnswerCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        choices_data = serializer.validated_data["choices"]
+        grade = grade_answer(question, [choice["uuid"] for choice in choices_data])
+        return Response(AnswerCheckSerializer(grade).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="compress",
+                type=str,
+                enum=["gzip"],
+                description="Compress the export with gzip",
+                required=False,
+            ),
+        ],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def export(self, request, *args, **kwargs):
+        """Stream filtered questions with tags and choices as NDJSON"""
+        queryset = self.filter_queryset(self.get_queryset())
+        content, content_type = iter_ndjson(queryset), "application/x-ndjson"
+        filename = "questions.ndjson"
+        if request.query_params.get("compress") == "gzip":
+            content, content_type = iter_gzip(content), "application/gzip"
+            filename += ".gz"
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class QuestionImportViewSet(GenericViewSet):
+    """Staff-only bulk import, processed by a Celery task"""
+
+    lookup_field = "task_id"
+    permission_classes = (IsAdminUser,)
+    serializer_class = QuestionImportUploadSerializer
+
+    def get_status_data(self, task_id, result):
+        data = {"task_id": task_id, "status": result.state}
+        if result.state == "PROGRESS":
+            data["progress"] = result.info
+        elif result.state == "SUCCESS":
+            data["result"] = result.result
+        return QuestionImportStatusSerializer(data).data
+
+    @extend_schema(responses={202: QuestionImportStatusSerializer})
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file, format = (
+            serializer.validated_data["file"],
+            serializer.validated_data["format"],
+        )
+        path = default_storage.save(f"question-imports/import.{format}", file)
+        result = import_questions_task.delay(path, request.user.pk, format)
+        return Response(
+            self.get_status_data(result.id, result), status=HTTP_202_ACCEPTED
+        )
+
+    @extend_schema(responses=QuestionImportStatusSerializer)
+    def retrieve(self, request, task_id=None, *args, **kwargs):
+        result = import_questions_task.AsyncResult(task_id)
+        return Response(self.get_status_data(task_id, result))
+
+
+class CacheStatsViewSet(GenericViewSet):
+    """Staff-only hit and miss counters of the page cache tiers.
+
+    Counters are per process, every worker answers with its own.
+    """
+
+    permission_classes = (IsAdminUser,)
+    serializer_class = CacheStatsSerializer
+
+    def list(self, request, *args, **kwargs):
+        data = {"pid": os.getpid(), **page_cache.get_stats()}
+        return Response(self.get_serializer(data).data)
+
 
 class ChoiceViewSet(
     ListModelMixin,
@@ -133,11 +402,17 @@ class ChoiceViewSet(
         queryset = Choice.objects.select_related("question")
         return queryset
 
-    @method_decorator(cache_page(settings.API_CACHE_TIME))
+    @method_decorator(
+        cache_page_versioned(settings.API_CACHE_TIME, depends_on=[CHOICES])
+    )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-    @method_decorator(cache_page(settings.API_CACHE_TIME))
+    @method_decorator(
+        cache_page_versioned(
+            settings.API_CACHE_TIME, depends_on=[choice_scope("{uuid}")]
+        )
+    )
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
@@ -148,6 +423,10 @@ class ChoiceViewSet(
         instance.delete()
 
 
+@extend_schema_view(
+    list=extend_schema(parameters=FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
 class AnswerViewSet(
     ListModelMixin,
     CreateModelMixin,
@@ -158,12 +437,44 @@ class AnswerViewSet(
     serializer_class = AnswerSerializer
     lookup_field = "uuid"
     permission_classes = (IsAuthenticated,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = AnswerPagination
 
     def get_queryset(self):
-        queryset = (
-            Answer.objects.filter(user=self.request.user)
-            .select_related("question")
-            .prefetch_related("choices__question")
-        )
+        fieldset = Fieldset.from_request(self.request)
+        queryset = Answer.objects.filter(user=self.request.user)
+        if fieldset.wants("question"):
+            queryset = queryset.select_related("question")
+        if fieldset.wants("choices"):
+            queryset = queryset.prefetch_related("choices__question")
         return queryset
+
+
+class ReviewViewSet(GenericViewSet):
+    """Spaced repetition queue of the current user, scheduled by answers"""
+
+    serializer_class = ReviewSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        # authenticated by permission_classes
+        user = cast(User, self.request.user)
+        return Review.objects.filter(user=user, question__is_published=True)
+
+    @extend_schema(
+        parameters=[ReviewDueQuerySerializer, *FIELDSET_PARAMETERS],
+        responses=ReviewSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def due(self, request, *args, **kwargs):
+        """Next `n` questions due for review, most overdue first"""
+        params = ReviewDueQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        # range scan of the (user, due_at) index
+        reviews = (
+            self.get_queryset()
+            .filter(due_at__lte=timezone.now())
+            .select_related("question__user")
+            .prefetch_related("question__tags", "question__choices")
+            .order_by("due_at")[: params.validated_data["n"]]
+        )
+        return Response(self.get_serializer(reviews, many=True).data)
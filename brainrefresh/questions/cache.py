@@ -0,0 +1,443 @@
+"""Versioned cache invalidation for the questions api.
+
+Every cached response is stored under a key prefix built from the current
+versions of the scopes it depends on (the tag list, a single question, ...).
+Invalidating a scope only replaces its version, so the pages that depend on it
+become unreachable while unrelated pages stay warm.
+
+Pages are rebuilt by a single worker holding a lock, concurrent requests get
+the stale page meanwhile. TTLs are jittered and pages are refreshed early
+with a probability growing towards expiry, so keys don't expire at once.
+
+Pages are stored as their rendered body, status and headers, a fresh response
+is built on every hit. Versioned pages and the versions of their scopes are
+also kept in small LRUs of every process (`API_LOCAL_CACHE_SIZE`). Page keys
+are never rewritten, an edit bumps the shared version instead. Local versions
+are trusted for `LOCAL_VERSION_TIMEOUT`, so a hot page is served without a
+round-trip to the shared cache. The process that made an edit sees it at
+once, other processes within `LOCAL_VERSION_TIMEOUT`.
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable
+from functools import partial, wraps
+from typing import NamedTuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+from django.http import HttpResponse
+from django.utils.cache import (
+    add_never_cache_headers,
+    get_cache_key,
+    learn_cache_key,
+    patch_response_headers,
+)
+
+VERSION_KEY_PREFIX = "questions:version"
+IDS_KEY_PREFIX = "questions:ids"
+STALE_KEY_PREFIX = "questions:stale"
+LOCK_KEY_PREFIX = "questions:lock"
+
+# stored TTL is shortened by up to this fraction
+TTL_JITTER = 0.1
+# > 1 refreshes earlier, < 1 later
+EARLY_REFRESH_BETA = 1.0
+STALE_TIMEOUT = 60 * 60 * 24
+LOCK_TIMEOUT = 30
+# how long to wait for the page without a stale one
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+# upper bound of local copies lifetime
+LOCAL_TIMEOUT = 60
+# seconds local versions are used without checking the shared ones
+LOCAL_VERSION_TIMEOUT = 1.0
+# headers of the current state set by `conditional`, never stored
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+# sent with the `scopes` whose versions were bumped
+scopes_invalidated = Signal()
+
+# list scopes
+TAGS = "tags"
+QUESTIONS = "questions"
+CHOICES = "choices"
+
+
+def tag_scope(slug: str) -> str:
+    return f"tag:{slug}"
+
+
+def question_scope(uuid) -> str:
+    return f"question:{uuid}"
+
+
+def choice_scope(uuid) -> str:
+    return f"choice:{uuid}"
+
+
+def _version_key(scope: str) -> str:
+    return f"{VERSION_KEY_PREFIX}:{scope}"
+
+
+def _new_version() -> str:
+    """Random version prefixed with its unix time in hex"""
+    return f"{int(time.time()):x}-{uuid4().hex[:8]}"
+
+
+def get_modified_at(versions: Iterable[str]) -> int | None:
+    """Unix time of the latest of `versions`, None if any has no time"""
+    timestamps = []
+    for version in versions:
+        timestamp, separator, _ = version.partition("-")
+        if not separator:
+            return None
+        timestamps.append(int(timestamp, 16))
+    return max(timestamps, default=None)
+
+
+def get_versions(scopes: Iterable[str]) -> list[str]:
+    """Return current versions of `scopes`, initializing the missing ones"""
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_version(), timeout=None)
+        # re-read, another process could have initialized the key first
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, "") for key in keys]
+
+
+def get_request_versions(request, scopes: list[str]) -> list[str]:
+    """`page_cache.get_versions` read once per request.
+
+    The ETag of a page and its cache key are built from the same versions.
+    """
+    # DRF requests wrap the HttpRequest
+    request = getattr(request, "_request", request)
+    if not hasattr(request, "_scope_versions"):
+        request._scope_versions = {}
+    key = tuple(scopes)
+    if key not in request._scope_versions:
+        request._scope_versions[key] = page_cache.get_versions(scopes)
+    return request._scope_versions[key]
+
+
+def bump_versions(scopes: Iterable[str]) -> None:
+    scopes = set(scopes)
+    cache.set_many(
+        {_version_key(scope): _new_version() for scope in scopes}, timeout=None
+    )
+    page_cache.discard_versions(scopes)
+    scopes_invalidated.send(sender=None, scopes=scopes)
+
+
+def invalidate(*scopes: str) -> None:
+    """Bump versions of `scopes` once the current transaction is committed.
+
+    Deferring to commit prevents a concurrent request from caching the old
+    state under the new version.
+    """
+    if scopes:
+        transaction.on_commit(partial(bump_versions, scopes))
+
+
+def get_cached_ids(queryset, depends_on: Iterable[str], timeout: int) -> array:
+    """Primary keys of `queryset`, cached by its SQL and versions of `depends_on`.
+
+    Ids are kept as a compact array of 64-bit integers.
+    """
+    queryset = queryset.order_by().values_list("pk", flat=True)
+    sql, params = queryset.query.sql_with_params()
+    query_hash = hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+    versions = ".".join(get_versions(depends_on))
+    key = f"{IDS_KEY_PREFIX}:{versions}:{query_hash}"
+    ids = cache.get(key)
+    if ids is None:
+        ids = array("q", queryset)
+        cache.set(key, ids, timeout)
+    return ids
+
+
+class CachedPage(NamedTuple):
+    """Rendered page, immutable so local copies can be shared by requests"""
+
+    status: int
+    headers: tuple[tuple[str, str], ...]
+    content: bytes
+    expires_at: float
+    # time spent to build the page
+    delta: float
+
+    @classmethod
+    def from_response(cls, response, expires_at: float, delta: float):
+        headers = tuple(
+            (header, value)
+            for header, value in response.items()
+            if header not in VALIDATOR_HEADERS
+        )
+        return cls(response.status_code, headers, response.content, expires_at, delta)
+
+    def to_response(self) -> HttpResponse:
+        return HttpResponse(
+            self.content, status=self.status, headers=dict(self.headers)
+        )
+
+
+class TwoTierCache:
+    """Process local LRU of immutable values in front of the shared cache.
+
+    Only for keys which embed scope versions. Implements the `get` and `set`
+    used by `django.utils.cache`, values are `CachedPage` and header lists,
+    stored as tuples. Counts hits and misses of both tiers.
+    """
+
+    def __init__(self):
+        self._values: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._versions: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Counter[str] = Counter()
+
+    def _get_local(self, key: str):
+        with self._lock:
+            item = self._values.get(key)
+            if item is not None and item[0] <= time.monotonic():
+                del self._values[key]
+                item = None
+            if item is None:
+                self.stats["local_misses"] += 1
+                return None
+            self._values.move_to_end(key)
+            self.stats["local_hits"] += 1
+            return item[1]
+
+    def _set_local(self, key: str, value, timeout: float) -> None:
+        maxsize = settings.API_LOCAL_CACHE_SIZE
+        if not maxsize:
+            return
+        if isinstance(value, list):
+            value = tuple(value)
+        item = (time.monotonic() + min(timeout, LOCAL_TIMEOUT), value)
+        with self._lock:
+            self._values[key] = item
+            self._values.move_to_end(key)
+            while len(self._values) > maxsize:
+                self._values.popitem(last=False)
+
+    def get(self, key: str, default=None):
+        if (value := self._get_local(key)) is not None:
+            return value
+        value = cache.get(key)
+        with self._lock:
+            self.stats["shared_hits" if value is not None else "shared_misses"] += 1
+        if value is None:
+            return default
+        self._set_local(key, value, LOCAL_TIMEOUT)
+        return value
+
+    def set(self, key: str, value, timeout: float) -> None:
+        cache.set(key, value, timeout)
+        self._set_local(key, value, timeout)
+
+    def get_versions(self, scopes: Iterable[str]) -> list[str]:
+        """`get_versions` through versions seen in `LOCAL_VERSION_TIMEOUT`"""
+        scopes = list(scopes)
+        if not settings.API_LOCAL_CACHE_SIZE:
+            return get_versions(scopes)
+        now = time.monotonic()
+        with self._lock:
+            versions = {
+                scope: item[1]
+                for scope in scopes
+                if (item := self._versions.get(scope)) and item[0] > now
+            }
+        if missing := [scope for scope in scopes if scope not in versions]:
+            shared = dict(zip(missing, get_versions(missing)))
+            versions.update(shared)
+            self._set_versions(shared)
+        return [versions[scope] for scope in scopes]
+
+    def _set_versions(self, versions: dict[str, str]) -> None:
+        """Keep `versions` of scopes for `LOCAL_VERSION_TIMEOUT`"""
+        maxsize = settings.API_LOCAL_CACHE_SIZE
+        if not maxsize:
+            return
+        expires_at = time.monotonic() + LOCAL_VERSION_TIMEOUT
+        with self._lock:
+            for scope, version in versions.items():
+                # versions weren't stored, e.g. dummy or unavailable cache
+                if not version:
+                    continue
+                self._versions[scope] = (expires_at, version)
+                self._versions.move_to_end(scope)
+            while len(self._versions) > maxsize:
+                self._versions.popitem(last=False)
+
+    def discard_versions(self, scopes: Iterable[str]) -> None:
+        """Read versions of `scopes` from the shared cache next time"""
+        with self._lock:
+            for scope in scopes:
+                self._versions.pop(scope, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._versions.clear()
+            self.stats.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self.stats, "local_size": len(self._values)}
+
+
+page_cache = TwoTierCache()
+
+
+def _jittered(timeout: int) -> int:
+    return max(1, round(timeout * (1 - TTL_JITTER * random.random())))
+
+
+def _should_refresh_early(page: CachedPage) -> bool:
+    """Probabilistic early expiration, likelier for slow pages close to expiry"""
+    jitter = -page.delta * EARLY_REFRESH_BETA * math.log(1 - random.random())
+    return time.time() + jitter >= page.expires_at
+
+
+def _get_page(request, key_prefix: str, store) -> CachedPage | None:
+    cache_key = get_cache_key(request, key_prefix, "GET", cache=store)
+    page = store.get(cache_key) if cache_key else None
+    return page if isinstance(page, CachedPage) else None
+
+
+def _wait_for_page(request, key_prefix: str, store) -> CachedPage | None:
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        if page := _get_page(request, key_prefix, store):
+            return page
+    return None
+
+
+def _stale_response(page: CachedPage):
+    """Response of a stale page which clients must neither keep nor revalidate"""
+    response = page.to_response()
+    add_never_cache_headers(response)
+    # `conditional` doesn't set validators of the current state either
+    response.is_stale = True  # type: ignore[attr-defined]
+    return response
+
+
+def _is_cacheable(response) -> bool:
+    """Conditions of CacheMiddleware, pages are stored without cookies"""
+    if response.streaming or response.status_code != 200 or response.cookies:
+        return False
+    return "private" not in response.get("Cache-Control", ())
+
+
+def cache_page_coalesced(
+    timeout: int, key_prefix: str, stale_key_prefix: str, store=page_cache
+):
+    """`cache_page` which rebuilds a missing page in a single worker.
+
+    Other workers get the page stored under `stale_key_prefix` meanwhile,
+    or wait for the new one if there is no stale page. Pages under
+    `key_prefix` are kept in `store`, stale pages in the shared cache only.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_func(request, *args, **kwargs)
+            page = _get_page(request, key_prefix, store)
+            if page is not None and not _should_refresh_early(page):
+                return page.to_response()
+            url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+            lock_key = f"{LOCK_KEY_PREFIX}:{key_prefix}:{url_hash}"
+            locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+            if not locked:
+                # another worker rebuilds the page
+                if page is not None:
+                    return page.to_response()
+                if stale_page := _get_page(request, stale_key_prefix, cache):
+                    return _stale_response(stale_page)
+                if page := _wait_for_page(request, key_prefix, store):
+                    return page.to_response()
+            started = time.monotonic()
+
+            def save_page(response):
+                try:
+                    ttl = _jittered(timeout)
+                    delta = time.monotonic() - started
+                    page = CachedPage.from_response(response, time.time() + ttl, delta)
+                    for prefix, prefix_ttl, prefix_store in [
+                        (key_prefix, ttl, store),
+                        (stale_key_prefix, STALE_TIMEOUT, cache),
+                    ]:
+                        cache_key = learn_cache_key(
+                            request, response, prefix_ttl, prefix, cache=prefix_store
+                        )
+                        prefix_store.set(cache_key, page, prefix_ttl)
+                finally:
+                    if locked:
+                        cache.delete(lock_key)
+
+            # save_page releases the lock once the page is stored
+            saving = False
+            try:
+                response = view_func(request, *args, **kwargs)
+                if not _is_cacheable(response):
+                    return response
+                patch_response_headers(response, timeout)
+                saving = True
+                # DRF responses are stored once rendered
+                if hasattr(response, "render") and callable(response.render):
+                    response.add_post_render_callback(save_page)
+                else:
+                    save_page(response)
+                return response
+            finally:
+                if locked and not saving:
+                    cache.delete(lock_key)
+
+        return _wrapped_view
+
+    return decorator
+
+
+def cache_page_versioned(timeout: int, depends_on: Iterable[str]) -> Callable:
+    """`cache_page_coalesced` keyed by the versions of `depends_on`.
+
+    Scopes are formatted with the view kwargs, e.g. "question:{uuid}".
+    The previous version of a page is served as stale while it is rebuilt.
+    """
+    depends_on = list(depends_on)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            scopes = [scope.format(**kwargs) for scope in depends_on]
+            versions = get_request_versions(request, scopes)
+            key_prefix = ".".join(versions)
+            stale_key_prefix = f"{STALE_KEY_PREFIX}:{'.'.join(scopes)}"
+            cached_view = cache_page_coalesced(
+                timeout,
+                key_prefix=key_prefix,
+                stale_key_prefix=stale_key_prefix,
+                # versions weren't stored (dummy or unavailable cache), local
+                # copies of such a page could never be invalidated
+                store=page_cache if all(versions) else cache,
+            )(view_func)
+            return cached_view(request, *args, **kwargs)
+
+        return _wrapped_view
+
+    return decorator
@@ -0,0 +1,74 @@
+"""Streaming export of questions with their tags and choices as NDJSON.
+
+Rows are read with a server-side cursor in chunks, so memory stays flat
+regardless of the amount of exported questions. Exported rows can be loaded
+back with `importer`.
+"""
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .models import Choice, Tag
+
+CHUNK_SIZE = 500
+
+
+def get_export_queryset(queryset):
+    """`queryset` with only the relations and fields of an exported row"""
+    return (
+        queryset.select_related("user")
+        .prefetch_related(None)
+        .prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("slug")),
+            Prefetch(
+                "choices",
+                queryset=Choice.objects.only("question", "text", "is_correct"),
+            ),
+        )
+    )
+
+
+def question_to_dict(question) -> dict:
+    return {
+        "uuid": question.uuid,
+        "user": question.user.username,
+        "title": question.title,
+        "text": question.text,
+        "explanation": question.explanation,
+        "language": question.language,
+        "is_published": question.is_published,
+        "is_multichoice": question.is_multichoice,
+        "created_at": question.created_at,
+        "updated_at": question.updated_at,
+        "tags": [tag.slug for tag in question.tags.all()],
+        "choices": [
+            {"text": choice.text, "is_correct": choice.is_correct}
+            for choice in question.choices.all()
+        ],
+    }
+
+
+def iter_ndjson(queryset, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield exported questions of `queryset`, one chunk of lines at a time"""
+    questions = get_export_queryset(queryset).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(questions, chunk_size)):
+        yield b"".join(
+            json.dumps(
+                question_to_dict(question), cls=DjangoJSONEncoder, ensure_ascii=False
+            ).encode()
+            + b"\n"
+            for question in chunk
+        )
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a stream of `chunks` into a gzip stream"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,178 @@
+"""Bulk import of questions with their choices and tags.
+
+JSON Lines - one object per line:
+
+    {"title": "Capital of France?", "language": "EN", "is_published": true,
+     "tags": ["geography"], "choices": [{"text": "Paris", "is_correct": true}]}
+
+CSV - the same columns, `tags` are separated by commas, `choices` by "|"
+with correct ones prefixed by "*", e.g. "*Paris|London".
+"""
+import csv
+import json
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+from typing import IO, NamedTuple
+
+from django.db import transaction
+from rest_framework import serializers
+
+from brainrefresh.utils.misc import make_slug
+
+from .cache import CHOICES, QUESTIONS, TAGS, invalidate, tag_scope
+from .models import Choice, Question, Tag
+from .services import refresh_tags_question_count
+
+FORMATS = ("jsonl", "csv")
+QUESTION_FIELDS = ("title", "text", "explanation", "language", "is_published")
+
+
+class RowError(NamedTuple):
+    line: int
+    errors: dict
+
+
+class ImportResult(NamedTuple):
+    processed: int
+    created: int
+    errors: list[RowError]
+
+
+class QuestionImportSerializer(serializers.Serializer):
+    class ChoiceSerializer(serializers.Serializer):
+        text = serializers.CharField()
+        is_correct = serializers.BooleanField(default=False)
+
+    title = serializers.CharField(max_length=100)
+    text = serializers.CharField(allow_blank=True, default="")
+    explanation = serializers.CharField(allow_blank=True, default="")
+    language = serializers.ChoiceField(Question.Lang.choices, default=Question.Lang.EN)
+    is_published = serializers.BooleanField(default=False)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=100), default=list
+    )
+    choices = ChoiceSerializer(many=True, default=list)
+
+    def validate_tags(self, labels):
+        """Map tag slugs to labels, the first label of a slug wins"""
+        tags: dict[str, str] = {}
+        for label in labels:
+            slug = make_slug(label)[: Tag._meta.get_field("slug").max_length]
+            if not slug:
+                raise serializers.ValidationError(f"Tag {label!r} has no valid slug.")
+            tags.setdefault(slug, label)
+        return tags
+
+
+def get_format(filename: str) -> str | None:
+    extension = filename.rsplit(".", 1)[-1].lower()
+    return extension if extension in FORMATS else None
+
+
+def read_rows(file: IO[str], format: str) -> Iterator[tuple[int, dict | ValueError]]:
+    """Yield line numbers with raw rows, unparsable rows are yielded as errors"""
+    if format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            # empty cells fall back to defaults
+            row = {key: value for key, value in row.items() if value not in ("", None)}
+            if "tags" in row:
+                row["tags"] = [tag.strip() for tag in row["tags"].split(",")]
+                row["tags"] = [tag for tag in row["tags"] if tag]
+            if "choices" in row:
+                choices = [text.strip() for text in row["choices"].split("|")]
+                row["choices"] = [
+                    {"text": text.removeprefix("*"), "is_correct": text.startswith("*")}
+                    for text in choices
+                ]
+            yield reader.line_num, row
+        return
+    for line, raw in enumerate(file, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as e:
+            yield line, e
+            continue
+        yield line, row if isinstance(row, dict) else ValueError("Expected an object.")
+
+
+def _get_or_create_tags(labels: dict[str, str]) -> dict[str, int]:
+    """Map tag slugs to ids, creating the missing tags"""
+    tag_ids = dict(Tag.objects.filter(slug__in=labels).values_list("slug", "pk"))
+    missing = [slug for slug in labels if slug not in tag_ids]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(label=labels[slug], slug=slug) for slug in missing],
+            ignore_conflicts=True,
+        )
+        tag_ids.update(Tag.objects.filter(slug__in=missing).values_list("slug", "pk"))
+    return tag_ids
+
+
+@transaction.atomic()
+def _create_questions(rows: list[dict], user) -> None:
+    labels = {slug: label for row in rows for slug, label in row["tags"].items()}
+    tag_ids = _get_or_create_tags(labels)
+    questions = Question.objects.bulk_create(
+        Question(
+            user=user,
+            is_multichoice=sum(choice["is_correct"] for choice in row["choices"]) > 1,
+            **{field: row[field] for field in QUESTION_FIELDS},
+        )
+        for row in rows
+    )
+    Choice.objects.bulk_create(
+        Choice(question=question, **choice)
+        for question, row in zip(questions, rows)
+        for choice in row["choices"]
+    )
+    QuestionTag = Question.tags.through
+    QuestionTag.objects.bulk_create(
+        QuestionTag(question_id=question.pk, tag_id=tag_ids[slug])
+        for question, row in zip(questions, rows)
+        for slug in row["tags"]
+    )
+    refresh_tags_question_count(Tag.objects.filter(pk__in=tag_ids.values()))
+
+
+def import_questions(
+    rows: Iterable[tuple[int, dict | ValueError]],
+    user,
+    batch_size: int = 500,
+    on_progress: Callable[[int, int, int], None] | None = None,
+) -> ImportResult:
+    """Import `rows` of `read_rows` as questions of `user`.
+
+    Every batch is created in its own transaction with a few bulk inserts,
+    invalid rows are reported without aborting the batch. Bulk inserts bypass
+    model save() and signals, so is_multichoice, tag counts and cache are
+    maintained here. `on_progress` is called with processed, created and
+    failed row counts after each batch.
+    """
+    processed = created = 0
+    errors = []
+    tag_slugs: set[str] = set()
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        valid_rows = []
+        for line, data in batch:
+            if isinstance(data, ValueError):
+                errors.append(RowError(line, {"non_field_errors": [str(data)]}))
+                continue
+            serializer = QuestionImportSerializer(data=data)
+            if serializer.is_valid():
+                valid_rows.append(serializer.validated_data)
+            else:
+                errors.append(RowError(line, serializer.errors))
+        if valid_rows:
+            _create_questions(valid_rows, user)
+            tag_slugs.update(slug for row in valid_rows for slug in row["tags"])
+        processed += len(batch)
+        created += len(valid_rows)
+        if on_progress is not None:
+            on_progress(processed, created, len(errors))
+    if created:
+        invalidate(QUESTIONS, TAGS, CHOICES, *[tag_scope(slug) for slug in tag_slugs])
+    return ImportResult(processed, created, errors)
@@ -0,0 +1,37 @@
+from timeit import repeat
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from brainrefresh.questions.api.serializers import QuestionListValuesSerializer
+from brainrefresh.questions.models import Question
+from brainrefresh.utils.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = "Compare render time of a question list page by JSON renderers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=50, help="Page size")
+        parser.add_argument("--number", type=int, default=200, help="Renders per run")
+
+    def handle(self, *args, **options):
+        rows = Question.objects.published().values(
+            *QuestionListValuesSerializer.values_fields
+        )[: options["limit"]]
+        # urls are built for any allowed host
+        hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+        request = RequestFactory(HTTP_HOST=(hosts or ["localhost"])[0])
+        context = {"request": request.get("/api/questions/")}
+        results = QuestionListValuesSerializer(rows, many=True, context=context).data
+        page = {"limit": options["limit"], "offset": 0, "count": len(results)}
+        page.update(next=None, previous=None, results=results)
+        self.stdout.write(f"Page of {len(results)} questions")
+        for renderer in [JSONRenderer(), ORJSONRenderer()]:
+            number = options["number"]
+            best = min(repeat(lambda: renderer.render(page), number=number, repeat=5))
+            self.stdout.write(
+                f"{type(renderer).__name__}: {best / number * 1e6:.1f} us per page"
+            )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from brainrefresh.questions.api.views import QuestionViewSet
+from brainrefresh.questions.exporter import CHUNK_SIZE, iter_gzip, iter_ndjson
+from brainrefresh.questions.models import Question
+
+
+class Command(BaseCommand):
+    help = "Export published questions with tags and choices as NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file")
+        parser.add_argument("--tag", help="Part of tag slug")
+        parser.add_argument("--tags", help="Comma separated tag slugs")
+        parser.add_argument("--tags-match", choices=["any", "all"])
+        parser.add_argument("--user", help="Username of the questions author")
+        parser.add_argument("--language", choices=Question.Lang.values)
+        parser.add_argument("--gzip", action="store_true", help="Compress with gzip")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        # same filters as the api export
+        filter_names = ["tag", "tags", "tags_match", "user", "language"]
+        data = {name: options[name] for name in filter_names if options[name]}
+        filterset = QuestionViewSet.QuestionFilter(
+            data, queryset=Question.objects.published()
+        )
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+        exported = 0
+
+        def count_lines(chunks):
+            nonlocal exported
+            for chunk in chunks:
+                exported += chunk.count(b"\n")
+                yield chunk
+
+        content = count_lines(iter_ndjson(filterset.qs, options["chunk_size"]))
+        if options["gzip"]:
+            content = iter_gzip(content)
+        with open(options["path"], "wb") as file:
+            file.writelines(content)
+        self.stdout.write(self.style.SUCCESS(f"Exported {exported} questions"))
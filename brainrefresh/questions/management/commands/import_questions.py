@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from brainrefresh.questions.importer import (
+    FORMATS,
+    get_format,
+    import_questions,
+    read_rows,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import questions with choices and tags from a JSON Lines or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON Lines or CSV file")
+        parser.add_argument(
+            "--user", required=True, help="Username of the questions author"
+        )
+        parser.add_argument(
+            "--format", choices=FORMATS, help="File format, by extension if omitted"
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        format = options["format"] or get_format(options["path"])
+        if format is None:
+            raise CommandError(f"Unknown file format, use --format {FORMATS}")
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']!r} does not exist")
+
+        def on_progress(processed, created, failed):
+            self.stdout.write(f"Processed {processed} rows, {failed} failed")
+
+        with open(options["path"], encoding="utf-8", newline="") as file:
+            result = import_questions(
+                read_rows(file, format),
+                user,
+                batch_size=options["batch_size"],
+                on_progress=on_progress,
+            )
+        for error in result.errors:
+            self.stderr.write(f"Line {error.line}: {error.errors}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.created} questions, {len(result.errors)} failed"
+            )
+        )
@@ -0,0 +1,52 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+
+from brainrefresh.questions.models import Answer, LanguageStats, TagStats
+
+STATS_AGGREGATES = {
+    "attempts": Count("pk"),
+    "correct": Count("pk", filter=Q(is_correct=True)),
+    "last_attempt_at": Max("created_at"),
+}
+
+
+class Command(BaseCommand):
+    help = "Rebuild answer stats of every user by tag and language from answers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def rebuild(self, model, answers, batch_size: int) -> int:
+        """Replace rows of `model` with `answers` values aggregated per row"""
+        rows = answers.annotate(**STATS_AGGREGATES).order_by()
+        rows = rows.iterator(chunk_size=batch_size)
+        model.objects.all().delete()
+        rebuilt = 0
+        while batch := list(islice(rows, batch_size)):
+            model.objects.bulk_create(
+                model(user_id=row.pop("user"), **row) for row in batch
+            )
+            rebuilt += len(batch)
+        return rebuilt
+
+    @transaction.atomic()
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        tags = self.rebuild(
+            TagStats,
+            Answer.objects.filter(question__tags__isnull=False).values(
+                "user", tag_id=F("question__tags")
+            ),
+            batch_size,
+        )
+        languages = self.rebuild(
+            LanguageStats,
+            Answer.objects.values("user", language=F("question__language")),
+            batch_size,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {tags} tag and {languages} language stats")
+        )
@@ -0,0 +1,54 @@
+from datetime import timedelta
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from brainrefresh.questions.models import Answer, Review
+from brainrefresh.questions.services import INITIAL_REVIEW_STATE, next_review_state
+
+REVIEW_FIELDS = ["ease", "interval", "repetitions", "due_at", "updated_at"]
+
+
+def iter_reviews(answers):
+    """Replay `answers` ordered by user, question and time into reviews"""
+    for (user_id, question_id), group in groupby(answers, key=itemgetter(0, 1)):
+        state = INITIAL_REVIEW_STATE
+        for _, _, is_correct, answered_at in group:
+            state = next_review_state(state, is_correct)
+        yield Review(
+            user_id=user_id,
+            question_id=question_id,
+            ease=state.ease,
+            interval=state.interval,
+            repetitions=state.repetitions,
+            due_at=answered_at + timedelta(days=state.interval),
+        )
+
+
+class Command(BaseCommand):
+    help = "Rebuild review schedules of every user from the answer history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        answers = (
+            Answer.objects.order_by("user", "question", "created_at")
+            .values_list("user", "question", "is_correct", "created_at")
+            .iterator(chunk_size=batch_size)
+        )
+        reviews = iter_reviews(answers)
+        rebuilt = 0
+        while batch := list(islice(reviews, batch_size)):
+            with transaction.atomic():
+                Review.objects.bulk_create(
+                    batch,
+                    update_conflicts=True,
+                    unique_fields=["user_id", "question_id"],
+                    update_fields=REVIEW_FIELDS,
+                )
+            rebuilt += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} reviews"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from brainrefresh.questions.services import refresh_questions_is_multichoice
+
+
+class Command(BaseCommand):
+    help = "Recompute Question.is_multichoice from correct choices in one UPDATE"
+
+    def handle(self, *args, **options):
+        updated = refresh_questions_is_multichoice()
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} questions"))
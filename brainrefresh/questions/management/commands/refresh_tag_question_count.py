@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from brainrefresh.questions.services import refresh_tags_question_count
+
+
+class Command(BaseCommand):
+    help = "Recompute Tag.question_count of published questions in one UPDATE"
+
+    def handle(self, *args, **options):
+        updated = refresh_tags_question_count()
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} tags"))
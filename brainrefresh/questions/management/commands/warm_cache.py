@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from brainrefresh.questions.models import Question, Tag
+from brainrefresh.questions.warming import get_detail_paths, warm_paths
+
+
+class Command(BaseCommand):
+    help = "Render configured API pages, tag and latest question pages into the cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--questions",
+            type=int,
+            default=100,
+            help="Warm detail pages of this many latest published questions",
+        )
+
+    def handle(self, *args, **options):
+        tag_slugs = Tag.objects.values_list("slug", flat=True)
+        question_uuids = (
+            Question.objects.published()
+            .order_by("-created_at", "-id")
+            .values_list("uuid", flat=True)[: options["questions"]]
+        )
+        paths = [
+            *settings.API_CACHE_WARM_PATHS,
+            *get_detail_paths(question_uuids, tag_slugs),
+        ]
+        total = failed = 0
+        for path, status_codes in warm_paths(paths).items():
+            for language, status_code in status_codes.items():
+                total += 1
+                if status_code != 200:
+                    failed += 1
+                    self.stderr.write(f"{path} [{language}]: {status_code}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Warmed {total - failed} of {total} pages")
+        )
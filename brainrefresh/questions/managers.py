@@ -1,14 +1,169 @@
-from django.db import models
+import operator
+from functools import reduce
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import models, transaction
+from django.db.models import Case, Exists, F, Func, OuterRef, Q, Value, When
+from django.db.models.functions import Concat, Greatest
+from django.utils.html import escape
+
+from brainrefresh.utils.misc import make_slug
+
+from .services import refresh_questions_is_multichoice
+
+# text search configurations of question languages, the search_vector
+# trigger of migration 0018 uses the same mapping
+SEARCH_CONFIGS = {"EN": "english", "RU": "russian"}
+DEFAULT_SEARCH_CONFIG = "english"
+# ts_headline selection markers, `headline_to_html` turns them into <mark>
+# once the text is escaped
+HEADLINE_START_SEL = "\x02"
+HEADLINE_STOP_SEL = "\x03"
+
+
+def headline_to_html(headline: str) -> str:
+    """HTML of a `search` headline: escaped text with matches in <mark>"""
+    return (
+        escape(headline)
+        .replace(HEADLINE_START_SEL, "<mark>")
+        .replace(HEADLINE_STOP_SEL, "</mark>")
+    )
+
+
+class TagQuerySet(models.QuerySet):
+    def matching(self, query: str):
+        """Tags similar to `query` by label or slug, most similar and popular first.
+
+        `query` is also transliterated like tag slugs, so "кош" and "kosh" both
+        match the tag "Кошки" by its slug "koshki". Matched by word similarity
+        over the pg_trgm GIN indexes, annotated as `similarity`.
+        """
+        slug = make_slug(query)
+        condition = Q(label__trigram_word_similar=query)
+        similarity: Func = TrigramWordSimilarity(query, "label")
+        if slug:
+            condition |= Q(slug__trigram_word_similar=slug)
+            similarity = Greatest(similarity, TrigramWordSimilarity(slug, "slug"))
+        return (
+            self.filter(condition)
+            .annotate(similarity=similarity)
+            .order_by("-similarity", "-question_count", "label")
+        )
+
+    def autocomplete(self, query: str, limit: int = 10):
+        return self.matching(query)[:limit]
+
+
+class TagManager(models.Manager):
+    def get_queryset(self):
+        return TagQuerySet(self.model, using=self._db)
+
+    def autocomplete(self, query: str, limit: int = 10):
+        return self.get_queryset().autocomplete(query, limit)
 
 
 class QuestionQuerySet(models.QuerySet):
     def published(self):
         return self.filter(is_published=True)
 
+    def _tag_exists(self, **lookups) -> Exists:
+        QuestionTag = self.model.tags.through
+        return Exists(QuestionTag.objects.filter(question=OuterRef("pk"), **lookups))
 
-class QuestionManager(models.Manager):
-    def get_queryset(self):
-        return QuestionQuerySet(self.model, using=self._db)
+    def with_tags(self, slugs, match_all: bool = False):
+        """Filter by exact tag slugs - any of them or all with `match_all`.
 
-    def published(self):
-        return self.get_queryset().published()
+        Slugs are resolved to tag ids first, then matched with EXISTS
+        subqueries over the through table, so rows are never duplicated.
+        """
+        slugs = set(slugs)
+        if not slugs:
+            return self
+        Tag = self.model.tags.field.related_model
+        tag_ids = list(Tag.objects.filter(slug__in=slugs).values_list("pk", flat=True))
+        if not match_all:
+            return self.filter(self._tag_exists(tag_id__in=tag_ids))
+        if len(tag_ids) < len(slugs):
+            return self.none()
+        queryset = self
+        for tag_id in tag_ids:
+            queryset = queryset.filter(self._tag_exists(tag_id=tag_id))
+        return queryset
+
+    def with_tag_like(self, value: str):
+        """Fuzzy filter by a part of tag slug, slow: LIKE scan over all tags"""
+        return self.filter(self._tag_exists(tag__slug__icontains=value))
+
+    def search(self, query: str, language: str | None = None):
+        """Full-text search ordered by rank, with highlighted `headline`.
+
+        `query` is parsed as a web search (quotes, `or`, `-`) with the search
+        configuration of `language`, or of every language. Headline text is
+        plain text with matches between `HEADLINE_START_SEL` and
+        `HEADLINE_STOP_SEL`, see `headline_to_html`.
+        """
+        configs = [SEARCH_CONFIGS[language]] if language in SEARCH_CONFIGS else []
+        search_query = reduce(
+            operator.or_,
+            [
+                SearchQuery(query, config=config, search_type="websearch")
+                for config in configs or SEARCH_CONFIGS.values()
+            ],
+        )
+        row_config = Case(
+            *[
+                When(language=lang, then=Value(config))
+                for lang, config in SEARCH_CONFIGS.items()
+            ],
+            default=Value(DEFAULT_SEARCH_CONFIG),
+        )
+        headline = SearchHeadline(
+            Concat("title", Value("\n"), "text", Value("\n"), "explanation"),
+            search_query,
+            config=row_config,
+            start_sel=HEADLINE_START_SEL,
+            stop_sel=HEADLINE_STOP_SEL,
+            max_fragments=2,
+        )
+        return (
+            self.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "-id")
+            # computed for the rows of a page only, after sorting
+            .annotate(headline=headline)
+        )
+
+
+QuestionManager = models.Manager.from_queryset(QuestionQuerySet)
+
+
+class ChoiceQuerySet(models.QuerySet):
+    def delete(self):
+        """Bulk delete, bypasses Choice.delete() - is_multichoice is refreshed here"""
+        Question = self.model._meta.get_field("question").related_model
+        with transaction.atomic(using=self.db):
+            question_ids = list(
+                self.filter(is_correct=True)
+                .order_by()
+                .values_list("question", flat=True)
+                .distinct()
+            )
+            result = super().delete()
+            if question_ids:
+                refresh_questions_is_multichoice(
+                    Question.objects.filter(pk__in=question_ids)
+                )
+        return result
+
+    delete.alters_data = True  # type: ignore[attr-defined]
+    delete.queryset_only = True  # type: ignore[attr-defined]
+
+
+class ChoiceManager(models.Manager):
+    def get_queryset(self):
+        return ChoiceQuerySet(self.model, using=self._db)
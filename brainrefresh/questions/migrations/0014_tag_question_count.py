@@ -0,0 +1,36 @@
+# Generated by Django 4.1 on 2026-10-17 21:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_published_questions(apps, schema_editor):
+    Tag = apps.get_model("questions", "Tag")
+    Question = apps.get_model("questions", "Question")
+    published_count = (
+        Question.tags.through.objects.filter(
+            tag=OuterRef("pk"), question__is_published=True
+        )
+        .order_by()
+        .values("tag")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    Tag.objects.update(question_count=Coalesce(Subquery(published_count), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0013_question_is_multichoice"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tag",
+            name="question_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_published_questions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+TASK_NAME = "Warm API cache"
+
+
+def create_schedule(apps, schema_editor):
+    IntervalSchedule = apps.get_model("django_celery_beat", "IntervalSchedule")
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    # longer than API_CACHE_WARM_DELAY, shorter than API_CACHE_TIME
+    schedule, _ = IntervalSchedule.objects.get_or_create(every=15, period="minutes")
+    # paths can be set in task kwargs, e.g. {"paths": ["/api/tags/"]}
+    PeriodicTask.objects.get_or_create(
+        name=TASK_NAME,
+        defaults={
+            "task": "brainrefresh.questions.tasks.warm_cache_task",
+            "interval": schedule,
+            "kwargs": "{}",
+        },
+    )
+
+
+def delete_schedule(apps, schema_editor):
+    PeriodicTask = apps.get_model("django_celery_beat", "PeriodicTask")
+    PeriodicTask.objects.filter(name=TASK_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0016_tag_updated_at"),
+        ("django_celery_beat", "0016_alter_crontabschedule_timezone"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_schedule, delete_schedule),
+    ]
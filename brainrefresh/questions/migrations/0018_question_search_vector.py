@@ -0,0 +1,61 @@
+# Generated by Django 4.1 on 2026-10-17 22:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# language configurations match managers.SEARCH_CONFIGS
+CREATE_TRIGGER = """
+CREATE FUNCTION questions_question_search_vector_update() RETURNS trigger AS $$
+DECLARE
+    config regconfig := CASE NEW.language
+        WHEN 'RU' THEN 'russian'
+        ELSE 'english'
+    END;
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector(config, coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector(config, coalesce(NEW.text, '')), 'B')
+        || setweight(to_tsvector(config, coalesce(NEW.explanation, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER questions_question_search_vector
+    BEFORE INSERT OR UPDATE OF title, text, explanation, language
+    ON questions_question
+    FOR EACH ROW EXECUTE FUNCTION questions_question_search_vector_update();
+
+UPDATE questions_question SET title = title;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER questions_question_search_vector ON questions_question;
+DROP FUNCTION questions_question_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0017_warm_cache_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="question",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name="question",
+            index=django.contrib.postgres.indexes.GinIndex(
+                condition=models.Q(("is_published", True)),
+                fields=["search_vector"],
+                name="question_pub_search_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1 on 2026-10-17 22:40
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("questions", "0018_question_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="tag",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["label"], name="tag_label_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["slug"], name="tag_slug_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
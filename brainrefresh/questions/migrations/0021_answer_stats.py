@@ -0,0 +1,100 @@
+# Generated by Django 4.1 on 2026-10-17 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("questions", "0020_review"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TagStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("correct", models.PositiveIntegerField(default=0)),
+                ("last_attempt_at", models.DateTimeField()),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s",
+                        to="questions.tag",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tag stats",
+                "verbose_name_plural": "Tag stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="LanguageStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("correct", models.PositiveIntegerField(default=0)),
+                ("last_attempt_at", models.DateTimeField()),
+                (
+                    "language",
+                    models.CharField(
+                        choices=[("EN", "En"), ("RU", "Ru")], max_length=5
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Language stats",
+                "verbose_name_plural": "Language stats",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="tagstats",
+            constraint=models.UniqueConstraint(
+                fields=("user", "tag"), name="tagstats_user_tag_uniq"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="languagestats",
+            constraint=models.UniqueConstraint(
+                fields=("user", "language"), name="languagestats_user_language_uniq"
+            ),
+        ),
+    ]
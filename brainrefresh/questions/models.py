@@ -1,43 +1,61 @@
 import uuid as uuid_lib
+from functools import partial
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from model_utils import FieldTracker
 
-from brainrefresh.utils.misc import get_unique_slug
+from brainrefresh.utils.misc import save_with_unique_slug
 
-from .managers import QuestionManager
-from .services import check_question_is_multichoice
+from .managers import ChoiceManager, QuestionManager, TagManager
+from .services import (
+    INITIAL_REVIEW_STATE,
+    change_tags_question_count,
+    check_question_is_multichoice,
+    refresh_questions_is_multichoice,
+)
 
 User = get_user_model()
 
 
 class Tag(models.Model):
+    # managers
+    objects = TagManager()
+    # fields
     label = models.CharField(max_length=100)
     slug = models.SlugField(max_length=110, blank=True, db_index=True, unique=True)
-    tracker = FieldTracker(fields=["label"])
+    # published questions, maintained by signals and Question.save
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+    # also bumped by question_count updates, used for conditional requests
+    updated_at = models.DateTimeField(auto_now=True)
+    tracker = FieldTracker(fields=["label", "slug"])
 
     class Meta:
         verbose_name = _("Tag")
         verbose_name_plural = _("Tags")
         ordering = ["label"]
+        indexes = [
+            # autocomplete
+            GinIndex(
+                fields=["label"], opclasses=["gin_trgm_ops"], name="tag_label_trgm_idx"
+            ),
+            GinIndex(
+                fields=["slug"], opclasses=["gin_trgm_ops"], name="tag_slug_trgm_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.label
 
     def save(self, *args, **kwargs):
         if not self.slug or self.label != self.tracker.previous("label"):
-            self.slug = get_unique_slug(Tag, self.label)
+            save = partial(super().save, *args, **kwargs)
+            return save_with_unique_slug(self, self.label, save)
         return super().save(*args, **kwargs)
 
-    @property
-    def question_count(self) -> int:
-        """Will generate n+1 query - query requires prefetch_related("questions")
-        TODO: refactor as service function or smh else, set .published()
-        """
-        return self.questions.count()
-
 
 class Question(models.Model):
     class Lang(models.TextChoices):
@@ -52,7 +70,7 @@ class Question(models.Model):
         Tag, blank=True, related_name="%(class)ss", related_query_name="%(class)s"
     )
     # fields
-    uuid = models.UUIDField(db_index=True, default=uuid_lib.uuid4, editable=False)
+    uuid = models.UUIDField(unique=True, default=uuid_lib.uuid4, editable=False)
     title = models.CharField(max_length=100)
     text = models.TextField(blank=True)
     explanation = models.TextField(blank=True)
@@ -61,31 +79,60 @@ class Question(models.Model):
     is_published = models.BooleanField(default=False)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # title, text and explanation, maintained by a database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+    tracker = FieldTracker(fields=["is_published"])
 
     class Meta:
         verbose_name = _("Question")
         verbose_name_plural = _("Questions")
         ordering = ["-created_at"]
+        indexes = [
+            # published feed, ordered as by QuestionViewSet cursor pagination
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_published=True),
+                name="question_pub_created_idx",
+            ),
+            models.Index(
+                fields=["language", "-created_at", "-id"],
+                condition=models.Q(is_published=True),
+                name="question_pub_lang_created_idx",
+            ),
+            # full-text search of published questions
+            GinIndex(
+                fields=["search_vector"],
+                condition=models.Q(is_published=True),
+                name="question_pub_search_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        self.is_multichoice = check_question_is_multichoice(self)
-        return super().save(*args, **kwargs)
+        publish_changed = self.pk and self.tracker.has_changed("is_published")
+        result = super().save(*args, **kwargs)
+        if publish_changed:
+            tag_ids = self.tags.values_list("pk", flat=True)
+            change_tags_question_count(tag_ids, 1 if self.is_published else -1)
+        return result
 
 
 class Choice(models.Model):
+    # managers
+    objects = ChoiceManager()
     # related fields
     question = models.ForeignKey(
         Question, on_delete=models.CASCADE, related_name="%(class)ss"
     )
     # fields
-    uuid = models.UUIDField(db_index=True, default=uuid_lib.uuid4, editable=False)
+    uuid = models.UUIDField(unique=True, default=uuid_lib.uuid4, editable=False)
     text = models.TextField()
     is_correct = models.BooleanField(default=False)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    tracker = FieldTracker(fields=["question_id", "is_correct"])
 
     class Meta:
         verbose_name = _("Choice")
@@ -95,6 +142,40 @@ class Choice(models.Model):
     def __str__(self):
         return f"{self.question.title} : {str(self.uuid)}"
 
+    def save(self, *args, **kwargs):
+        if self.pk:
+            changes_multichoice = self.tracker.has_changed("is_correct") or (
+                self.is_correct and self.tracker.has_changed("question_id")
+            )
+        else:
+            changes_multichoice = self.is_correct
+        # previous question loses a correct choice if the choice was moved
+        question_ids = {self.question_id, self.tracker.previous("question_id")} - {None}
+        with transaction.atomic():
+            result = super().save(*args, **kwargs)
+            if changes_multichoice:
+                refresh_questions_is_multichoice(
+                    Question.objects.filter(pk__in=question_ids)
+                )
+                self._refresh_loaded_question()
+        return result
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if self.tracker.previous("is_correct"):
+                refresh_questions_is_multichoice(
+                    Question.objects.filter(pk=self.question_id)
+                )
+                self._refresh_loaded_question()
+        return result
+
+    def _refresh_loaded_question(self):
+        """Sync the loaded question, its save() would write the old flag back"""
+        if Choice.question.is_cached(self):
+            question = self.question
+            question.is_multichoice = check_question_is_multichoice(question)
+
 
 class Answer(models.Model):
     # related fields
@@ -104,7 +185,7 @@ class Answer(models.Model):
     )
     choices = models.ManyToManyField(Choice, related_name="%(class)ss")
     # fields
-    uuid = models.UUIDField(db_index=True, default=uuid_lib.uuid4, editable=False)
+    uuid = models.UUIDField(unique=True, default=uuid_lib.uuid4, editable=False)
     is_correct = models.BooleanField(default=False)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -113,6 +194,93 @@ class Answer(models.Model):
         verbose_name = _("Answer")
         verbose_name_plural = _("Answers")
         ordering = ["-updated_at"]
+        indexes = [
+            # user answer history
+            models.Index(
+                fields=["user", "-updated_at", "-id"], name="answer_user_updated_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} answered {self.question.title}"
+
+
+class Review(models.Model):
+    """Spaced repetition state of a question for a user, see `services.record_review`"""
+
+    # related fields
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="%(class)ss")
+    question = models.ForeignKey(
+        Question, on_delete=models.CASCADE, related_name="%(class)ss"
+    )
+    # fields
+    ease = models.FloatField(default=INITIAL_REVIEW_STATE.ease)
+    # days until the next review
+    interval = models.PositiveIntegerField(default=INITIAL_REVIEW_STATE.interval)
+    # correct answers in a row
+    repetitions = models.PositiveIntegerField(default=INITIAL_REVIEW_STATE.repetitions)
+    due_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Review")
+        verbose_name_plural = _("Reviews")
+        ordering = ["due_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "question"], name="review_user_question_uniq"
+            ),
+        ]
+        indexes = [
+            # due queue of a user
+            models.Index(fields=["user", "due_at"], name="review_user_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} reviews {self.question.title}"
+
+
+class AnswerStats(models.Model):
+    """Answer rollup of a user, maintained by signals, see `services.change_answer_stats`"""
+
+    # related fields
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="%(class)s")
+    # fields
+    attempts = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    # kept when answers are deleted, until stats are rebuilt
+    last_attempt_at = models.DateTimeField()
+
+    class Meta:
+        abstract = True
+
+    @property
+    def accuracy(self) -> float | None:
+        return self.correct / self.attempts if self.attempts else None
+
+
+class TagStats(AnswerStats):
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="%(class)s")
+
+    class Meta:
+        verbose_name = _("Tag stats")
+        verbose_name_plural = _("Tag stats")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "tag"], name="tagstats_user_tag_uniq"
+            ),
+        ]
+
+
+class LanguageStats(AnswerStats):
+    language = models.CharField(max_length=5, choices=Question.Lang.choices)
+
+    class Meta:
+        verbose_name = _("Language stats")
+        verbose_name_plural = _("Language stats")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "language"], name="languagestats_user_language_uniq"
+            ),
+        ]
@@ -1,5 +1,339 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from uuid import UUID
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .cache import (
+    CHOICES,
+    QUESTIONS,
+    TAGS,
+    choice_scope,
+    invalidate,
+    question_scope,
+    tag_scope,
+)
+
+
+def change_tags_question_count(tag_ids: Iterable[int], delta: int) -> None:
+    """Atomically add `delta` to question_count of tags"""
+    from .models import Tag
+
+    if delta:
+        Tag.objects.filter(pk__in=tag_ids).update(
+            question_count=F("question_count") + delta, updated_at=Now()
+        )
+
+
+def refresh_tags_question_count(tags=None) -> int:
+    """Recompute question_count of `tags` (all by default) in one UPDATE"""
+    from .models import Question, Tag
+
+    QuestionTag = Question.tags.through
+    published_count = (
+        QuestionTag.objects.filter(tag=OuterRef("pk"), question__is_published=True)
+        .order_by()
+        .values("tag")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    question_count = Coalesce(Subquery(published_count), Value(0))
+    tags = Tag.objects.all() if tags is None else tags
+    # only changed tags are updated to keep their updated_at
+    return (
+        tags.annotate(new_question_count=question_count)
+        .exclude(question_count=F("new_question_count"))
+        .update(question_count=question_count, updated_at=Now())
+    )
+
+
+def update_questions_is_published(queryset, is_published: bool) -> int:
+    """Bulk publish/unpublish questions.
+
+    Bulk update bypasses Question.save() and signals, so tags of changed
+    questions are recounted and cache is invalidated here.
+    """
+    from .models import Question, Tag
+
+    questions = Question.objects.filter(
+        pk__in=list(
+            queryset.exclude(is_published=is_published).values_list("pk", flat=True)
+        )
+    )
+    question_uuids = list(questions.values_list("uuid", flat=True))
+    tag_slugs = list(
+        Tag.objects.filter(question__in=questions)
+        .values_list("slug", flat=True)
+        .distinct()
+    )
+    updated = questions.update(is_published=is_published)
+    refresh_tags_question_count(Tag.objects.filter(slug__in=tag_slugs))
+    invalidate(
+        QUESTIONS,
+        TAGS,
+        *[tag_scope(slug) for slug in tag_slugs],
+        *[question_scope(uuid) for uuid in question_uuids],
+    )
+    return updated
+
+
+def refresh_questions_is_multichoice(questions=None) -> int:
+    """Recompute is_multichoice of `questions` (all by default) in one UPDATE"""
+    from .models import Choice, Question
+
+    correct_count = (
+        Choice.objects.filter(question=OuterRef("pk"), is_correct=True)
+        .order_by()
+        .values("question")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    questions = Question.objects.all() if questions is None else questions
+    return questions.update(
+        is_multichoice=GreaterThan(Coalesce(Subquery(correct_count), Value(0)), 1)
+    )
+
+
+def set_question_choices(question, choices_data: list[dict], choices=None) -> bool:
+    """Create, update and delete choices of `question` to match `choices_data`.
+
+    Items with `uuid` update existing choices, the rest are created and the
+    choices missing from `choices_data` are deleted - they must have no
+    answers, see `validate_unanswered_choices`, and should be locked by the
+    caller. Bulk queries bypass Choice.save(), so is_multichoice of the
+    resulting choices is returned for the caller to save. Pass already
+    fetched `choices` of the question to skip the query.
+    """
+    from .models import Choice
+
+    if choices is None:
+        choices = question.choices.all()
+    existing = {choice.uuid: choice for choice in choices}
+    result, to_create, to_update = [], [], []
+    for data in choices_data:
+        choice = existing.pop(data.get("uuid"), None)
+        if choice is None:
+            choice = Choice(question=question, text=data["text"])
+            choice.is_correct = data.get("is_correct", False)
+            to_create.append(choice)
+        elif any(getattr(choice, field) != value for field, value in data.items()):
+            choice.text = data.get("text", choice.text)
+            choice.is_correct = data.get("is_correct", choice.is_correct)
+            choice.updated_at = timezone.now()
+            to_update.append(choice)
+        result.append(choice)
+    Choice.objects.bulk_create(to_create)
+    Choice.objects.bulk_update(to_update, ["text", "is_correct", "updated_at"])
+    if existing:
+        # deleted choices invalidate their caches by signals, the related
+        # manager sets their question without queries
+        question.choices.filter(
+            pk__in=[choice.pk for choice in existing.values()]
+        ).delete()
+    invalidate(
+        CHOICES,
+        question_scope(question.uuid),
+        *[choice_scope(choice.uuid) for choice in to_update],
+    )
+    return sum(choice.is_correct for choice in result) > 1
+
+
 def check_question_is_multichoice(instance) -> bool:
     from .models import Choice
 
     result = Choice.objects.filter(question__pk=instance.pk, is_correct=True).count()
     return True if result > 1 else False
+
+
+class AnswerGrade(NamedTuple):
+    is_correct: bool
+    correct_choices: list[UUID]
+    explanation: str
+
+
+def grade_answer(question, choice_uuids: Iterable[UUID], choices=None) -> AnswerGrade:
+    """Grade selected choices against the full set of correct choices.
+
+    Answer is correct only if every correct choice and nothing else was
+    selected, which covers both single and multichoice questions.
+    Pass already fetched `choices` of the question to skip the query.
+    """
+    from .models import Choice
+
+    if choices is None:
+        choices = Choice.objects.filter(question=question, is_correct=True)
+    correct_choices = [choice.uuid for choice in choices if choice.is_correct]
+    is_correct = bool(correct_choices) and set(choice_uuids) == set(correct_choices)
+    return AnswerGrade(is_correct, correct_choices, question.explanation)
+
+
+# SM-2 grades of a binary answer, out of 0-5
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 1
+MIN_EASE = 1.3
+
+
+class ReviewState(NamedTuple):
+    ease: float
+    interval: int
+    repetitions: int
+
+
+INITIAL_REVIEW_STATE = ReviewState(2.5, 0, 0)
+
+
+def next_review_state(state: ReviewState, is_correct: bool) -> ReviewState:
+    """SM-2 step: intervals of 1, 6, then interval * ease days, reset on failure"""
+    quality = CORRECT_QUALITY if is_correct else INCORRECT_QUALITY
+    ease = state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    ease = max(MIN_EASE, ease)
+    if quality < 3:
+        return ReviewState(ease, 1, 0)
+    if state.repetitions == 0:
+        interval = 1
+    elif state.repetitions == 1:
+        interval = 6
+    else:
+        interval = round(state.interval * ease)
+    return ReviewState(ease, interval, state.repetitions + 1)
+
+
+def record_review(
+    user, question, is_correct: bool, answered_at: datetime | None = None
+):
+    """Schedule the next review of `question` by `user` after a graded answer.
+
+    Locks the review row, call it in the transaction of the answer.
+    """
+    from .models import Review
+
+    answered_at = answered_at or timezone.now()
+    review, _ = Review.objects.select_for_update().get_or_create(
+        user=user, question=question, defaults={"due_at": answered_at}
+    )
+    state = next_review_state(
+        ReviewState(review.ease, review.interval, review.repetitions), is_correct
+    )
+    review.ease, review.interval, review.repetitions = state
+    review.due_at = answered_at + timedelta(days=state.interval)
+    review.save(
+        update_fields=["ease", "interval", "repetitions", "due_at", "updated_at"]
+    )
+    return review
+
+
+def change_answer_stats(answer, delta: int) -> None:
+    """Add (`delta` 1) or remove (`delta` -1) `answer` in stats of its user.
+
+    Rows are created on the first answer of a tag or language and updated
+    with atomic increments, so concurrent answers don't lose counts. Stats
+    follow the current tags and language of the question; run the
+    rebuild_answer_stats command after retagging to recount the history.
+    """
+    from .models import LanguageStats, Question, TagStats
+
+    QuestionTag = Question.tags.through
+    tag_ids = list(
+        QuestionTag.objects.filter(question_id=answer.question_id).values_list(
+            "tag_id", flat=True
+        )
+    )
+    language = answer.question.language
+    changes = {
+        "attempts": F("attempts") + delta,
+        "correct": F("correct") + delta * answer.is_correct,
+    }
+    if delta > 0:
+        changes["last_attempt_at"] = Greatest(
+            "last_attempt_at", Value(answer.created_at)
+        )
+        defaults = {"user_id": answer.user_id, "last_attempt_at": answer.created_at}
+        TagStats.objects.bulk_create(
+            [TagStats(tag_id=tag_id, **defaults) for tag_id in tag_ids],
+            ignore_conflicts=True,
+        )
+        LanguageStats.objects.bulk_create(
+            [LanguageStats(language=language, **defaults)], ignore_conflicts=True
+        )
+    else:
+        # answers predating the stats are not counted, keep counts positive
+        changes = {field: Greatest(change, 0) for field, change in changes.items()}
+    if tag_ids:
+        TagStats.objects.filter(tag_id__in=tag_ids, user_id=answer.user_id).update(
+            **changes
+        )
+    LanguageStats.objects.filter(language=language, user_id=answer.user_id).update(
+        **changes
+    )
+
+
+def remove_question_answers_from_stats(question) -> None:
+    """Remove every answer of `question` from stats of its users.
+
+    Two updates for any number of answers, run before the answers are
+    deleted along with the question instead of `change_answer_stats`.
+    """
+    from .models import Answer, LanguageStats, Question, TagStats
+
+    answers = Answer.objects.filter(question_id=question.pk)
+    user_answers = (
+        answers.filter(user_id=OuterRef("user_id")).order_by().values("user_id")
+    )
+    changes = {
+        field: Greatest(
+            F(field)
+            - Coalesce(Subquery(user_answers.annotate(n=count).values("n")), 0),
+            0,
+        )
+        for field, count in [
+            ("attempts", Count("pk")),
+            ("correct", Count("pk", filter=Q(is_correct=True))),
+        ]
+    }
+    user_ids = answers.values("user_id")
+    QuestionTag = Question.tags.through
+    tag_ids = QuestionTag.objects.filter(question_id=question.pk).values("tag_id")
+    TagStats.objects.filter(user_id__in=user_ids, tag_id__in=tag_ids).update(**changes)
+    LanguageStats.objects.filter(
+        user_id__in=user_ids, language=question.language
+    ).update(**changes)
+
+
+class UserStats(NamedTuple):
+    attempts: int
+    correct: int
+    accuracy: float | None
+    last_attempt_at: datetime | None
+    languages: list
+    tags: list
+
+
+def get_user_stats(user) -> UserStats:
+    """Answer stats of `user` in two queries, independent of the history size"""
+    from .models import LanguageStats, TagStats
+
+    languages = list(
+        LanguageStats.objects.filter(user=user, attempts__gt=0).order_by("language")
+    )
+    tags = list(
+        TagStats.objects.filter(user=user, attempts__gt=0)
+        .select_related("tag")
+        .order_by("-attempts", "tag__label")
+    )
+    # every answer is counted in exactly one language
+    attempts = sum(stats.attempts for stats in languages)
+    correct = sum(stats.correct for stats in languages)
+    return UserStats(
+        attempts=attempts,
+        correct=correct,
+        accuracy=correct / attempts if attempts else None,
+        last_attempt_at=max(
+            (stats.last_attempt_at for stats in languages), default=None
+        ),
+        languages=languages,
+        tags=tags,
+    )
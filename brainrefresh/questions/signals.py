@@ -1,23 +1,214 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import Choice, Question, Tag
+from .cache import (
+    CHOICES,
+    QUESTIONS,
+    TAGS,
+    choice_scope,
+    invalidate,
+    question_scope,
+    scopes_invalidated,
+    tag_scope,
+)
+from .models import Answer, Choice, Question, Tag
+from .services import (
+    change_answer_stats,
+    change_tags_question_count,
+    remove_question_answers_from_stats,
+)
+from .tasks import warm_cache_task
+from .warming import MAX_DETAIL_PAGES
+
+logger = logging.getLogger(__name__)
+
+WARM_PENDING_KEY = "questions:warm:pending"
+
+User = get_user_model()
+
+
+def get_origin_model(origin):
+    """Model of the deletion `origin` - the deleted instance or queryset"""
+    return type(origin) if isinstance(origin, Model) else origin.model
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_cache_for_tag(sender, instance, created=False, **kwargs):
+    """Tag pages and every question page that embeds the tag"""
+    slugs = {instance.slug, instance.tracker.previous("slug")} - {None}
+    question_uuids = (
+        [] if created else instance.questions.values_list("uuid", flat=True)
+    )
+    invalidate(
+        TAGS,
+        QUESTIONS,
+        *[tag_scope(slug) for slug in slugs],
+        *[question_scope(uuid) for uuid in question_uuids],
+    )
+
+
+@receiver(post_save, sender=Question)
+@receiver(pre_delete, sender=Question)
+def invalidate_cache_for_question(sender, instance, created=False, **kwargs):
+    """Question pages and pages of its tags - they display question_count"""
+    tag_slugs = [] if created else instance.tags.values_list("slug", flat=True)
+    invalidate(
+        QUESTIONS,
+        TAGS,
+        question_scope(instance.uuid),
+        *[tag_scope(slug) for slug in tag_slugs],
+    )
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def invalidate_cache_for_question_tags(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        questions = instance.questions.all()
+        if pk_set is not None:
+            questions = Question.objects.filter(pk__in=pk_set)
+        tag_slugs = [instance.slug]
+        question_uuids = questions.values_list("uuid", flat=True)
+    else:
+        tags = instance.tags.all()
+        if pk_set is not None:
+            tags = Tag.objects.filter(pk__in=pk_set)
+        tag_slugs = tags.values_list("slug", flat=True)
+        question_uuids = [instance.uuid]
+    invalidate(
+        QUESTIONS,
+        TAGS,
+        *[tag_scope(slug) for slug in tag_slugs],
+        *[question_scope(uuid) for uuid in question_uuids],
+    )
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def narrow_removed_pk_set(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop unlinked pks, post_remove gets every pk passed to remove()"""
+    if action != "pre_remove":
+        return
+    if reverse:
+        links = {"tag_id": instance.pk, "question_id__in": pk_set}
+        field = "question_id"
+    else:
+        links = {"question_id": instance.pk, "tag_id__in": pk_set}
+        field = "tag_id"
+    # locked, so concurrent removals of the same link are counted once
+    linked = sender.objects.select_for_update().filter(**links)
+    pk_set.intersection_update(linked.values_list(field, flat=True))
 
 
-@receiver([post_save, post_delete], sender=Tag)
-def invalidate_cache_for_tag(*args, **kwargs):
-    """TODO: redis cache with tag-based invalidation"""
-    cache.clear()
+@receiver(m2m_changed, sender=Question.tags.through)
+def update_tags_question_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Tag.question_count in sync with published questions"""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    delta = -1 if action in ("post_remove", "pre_clear") else 1
+    if reverse:
+        questions = instance.questions.all()
+        if pk_set is not None:
+            questions = Question.objects.filter(pk__in=pk_set)
+        published_count = questions.filter(is_published=True).count()
+        change_tags_question_count([instance.pk], delta * published_count)
+    elif instance.tracker.previous("is_published"):
+        tag_ids = pk_set if pk_set is not None else instance.tags.values("pk")
+        change_tags_question_count(tag_ids, delta)
 
 
-@receiver([post_save, post_delete], sender=Question)
-def invalidate_cache_for_question(*args, **kwargs):
-    """TODO: redis cache with tag-based invalidation"""
-    cache.clear()
+@receiver(pre_delete, sender=Question)
+def update_tags_question_count_on_delete(sender, instance, **kwargs):
+    """Through rows are deleted by cascade without m2m_changed"""
+    if instance.tracker.previous("is_published"):
+        change_tags_question_count(instance.tags.values("pk"), -1)
 
 
 @receiver([post_save, post_delete], sender=Choice)
-def invalidate_cache_for_choice(*args, **kwargs):
-    """TODO: redis cache with tag-based invalidation"""
-    cache.clear()
+def invalidate_cache_for_choice(sender, instance, origin=None, **kwargs):
+    """Choice pages and pages of its question - is_multichoice could change.
+
+    Choices deleted along with their question skip the question pages, they
+    are invalidated by the question deletion without loading it per choice.
+    """
+    scopes = [CHOICES, choice_scope(instance.uuid)]
+    if origin is None or get_origin_model(origin) is not Question:
+        scopes += [QUESTIONS, question_scope(instance.question.uuid)]
+    invalidate(*scopes)
+
+
+@receiver(post_save, sender=Answer)
+def add_answer_to_stats(sender, instance, created, **kwargs):
+    if created:
+        change_answer_stats(instance, 1)
+
+
+@receiver(pre_delete, sender=Answer)
+def remove_answer_from_stats(sender, instance, origin, **kwargs):
+    """Before cascades of question deletion remove the question tags.
+
+    Answers deleted along with their question are removed from stats at once
+    by `remove_question_answers_from_stats`, stats of a deleted user are
+    deleted with the user.
+    """
+    if get_origin_model(origin) not in (Question, User):
+        change_answer_stats(instance, -1)
+
+
+@receiver(pre_delete, sender=Question)
+def remove_question_from_stats(sender, instance, **kwargs):
+    remove_question_answers_from_stats(instance)
+
+
+def claim_warming(key: str, delay: int, claimed: list[str]) -> bool:
+    """Whether pages of `key` aren't scheduled in this `delay` window yet"""
+    pending_key = f"{WARM_PENDING_KEY}:{key}"
+    if cache.add(pending_key, 1, delay):
+        claimed.append(pending_key)
+        return True
+    return False
+
+
+@receiver(scopes_invalidated)
+def warm_invalidated_pages(sender, scopes, **kwargs):
+    """Schedule re-rendering of invalidated pages.
+
+    Every page is scheduled once per `API_CACHE_WARM_DELAY` window, so a
+    burst of edits is followed by a single warm up of the latest state.
+    Sent after the edit is committed, so a failed enqueue is only logged.
+    """
+    delay = settings.API_CACHE_WARM_DELAY
+    if not delay:
+        return
+    ids: dict[str, list[str]] = {"question": [], "tag": []}
+    claimed: list[str] = []
+    for scope in scopes:
+        kind, _, value = scope.partition(":")
+        if kind in ids and len(ids[kind]) < MAX_DETAIL_PAGES:
+            if claim_warming(scope, delay, claimed):
+                ids[kind].append(value)
+    warm_lists = bool({TAGS, QUESTIONS} & set(scopes)) and claim_warming(
+        "lists", delay, claimed
+    )
+    if not claimed:
+        return
+    kwargs = {
+        "paths": None if warm_lists else [],
+        "question_uuids": ids["question"],
+        "tag_slugs": ids["tag"],
+    }
+    try:
+        warm_cache_task.apply_async(kwargs=kwargs, countdown=delay)
+    except Exception:
+        logger.exception("Scheduling cache warming failed")
+        # let the next invalidation schedule them
+        cache.delete_many(claimed)
@@ -0,0 +1,54 @@
+import io
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+
+from config import celery_app
+
+from .importer import import_questions, read_rows
+from .warming import get_detail_paths, warm_paths
+
+User = get_user_model()
+
+
+@celery_app.task(bind=True)
+def import_questions_task(self, path: str, user_id: int, format: str) -> dict:
+    """Import questions from an uploaded file, reporting progress in task meta.
+
+    The file is removed from the storage when the import is finished.
+    """
+    user = User.objects.get(pk=user_id)
+
+    def on_progress(processed, created, failed):
+        if not self.request.called_directly:
+            meta = {"processed": processed, "created": created, "failed": failed}
+            self.update_state(state="PROGRESS", meta=meta)
+
+    try:
+        with default_storage.open(path, "rb") as file:
+            rows = read_rows(io.TextIOWrapper(file, encoding="utf-8"), format)
+            result = import_questions(rows, user, on_progress=on_progress)
+    finally:
+        default_storage.delete(path)
+    return {
+        "processed": result.processed,
+        "created": result.created,
+        "failed": len(result.errors),
+        "errors": [error._asdict() for error in result.errors],
+    }
+
+
+@celery_app.task()
+def warm_cache_task(
+    paths: list[str] | None = None,
+    question_uuids: Iterable[str] = (),
+    tag_slugs: Iterable[str] = (),
+) -> dict[str, dict[str, int]]:
+    """Re-render `paths`, `API_CACHE_WARM_PATHS` by default, and detail pages
+    of the given questions and tags into the cache, in every language.
+    """
+    if paths is None:
+        paths = settings.API_CACHE_WARM_PATHS
+    return warm_paths([*paths, *get_detail_paths(question_uuids, tag_slugs)])
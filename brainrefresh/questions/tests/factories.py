@@ -2,13 +2,14 @@ from collections.abc import Sequence
 from random import randrange
 from typing import Any
 
-from factory import Faker, SubFactory, post_generation
+from django.utils import timezone
+from factory import Faker, LazyFunction, SubFactory, post_generation
 from factory.django import DjangoModelFactory
 from factory.fuzzy import FuzzyChoice
 
 from brainrefresh.users.tests.factories import UserFactory
 
-from ..models import Answer, Choice, Question, Tag
+from ..models import Answer, Choice, Question, Review, Tag
 
 
 class TagFactory(DjangoModelFactory):
@@ -90,3 +91,12 @@ class AnswerFactory(DjangoModelFactory):
             for _ in range(size):
                 choice = ChoiceFactory()
                 self.choices.add(choice)
+
+
+class ReviewFactory(DjangoModelFactory):
+    class Meta:
+        model = Review
+
+    user = SubFactory(UserFactory)
+    question = SubFactory(QuestionFactory)
+    due_at = LazyFunction(timezone.now)
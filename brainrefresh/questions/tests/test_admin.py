@@ -0,0 +1,35 @@
+from django.urls import reverse
+
+from .factories import QuestionFactory, TagFactory
+
+
+class TestTagAdmin:
+    def test_search(self, admin_client):
+        url = reverse("admin:questions_tag_changelist")
+        response = admin_client.get(url, data={"q": "python"})
+        assert response.status_code == 200
+
+
+class TestQuestionAdmin:
+    def test_change(self, admin_client):
+        question = QuestionFactory()
+        url = reverse("admin:questions_question_change", args=[question.pk])
+        response = admin_client.get(url)
+        assert response.status_code == 200
+
+    def test_tags_autocomplete(self, admin_client):
+        python = TagFactory(label="Python")
+        TagFactory(label="Django")
+        response = admin_client.get(
+            reverse("admin:autocomplete"),
+            data={
+                "app_label": "questions",
+                "model_name": "question",
+                "field_name": "tags",
+                "term": "pyth",
+            },
+        )
+        assert response.status_code == 200
+        assert [result["id"] for result in response.json()["results"]] == [
+            str(python.pk)
+        ]
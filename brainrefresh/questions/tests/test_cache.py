@@ -0,0 +1,408 @@
+from functools import partial
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from .. import cache as questions_cache
+from ..cache import (
+    CHOICES,
+    LOCK_KEY_PREFIX,
+    QUESTIONS,
+    TAGS,
+    CachedPage,
+    TwoTierCache,
+    bump_versions,
+    cache_page_versioned,
+    choice_scope,
+    get_cached_ids,
+    get_versions,
+    page_cache,
+    question_scope,
+    tag_scope,
+)
+from .factories import ChoiceFactory, Question, QuestionFactory, TagFactory
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "questions-cache-tests",
+        }
+    }
+    yield
+    cache.clear()
+    page_cache.clear()
+
+
+def test_bump_versions_schedules_warming(settings):
+    settings.API_CACHE_WARM_DELAY = 5
+    with mock.patch("brainrefresh.questions.signals.warm_cache_task") as task:
+        bump_versions([QUESTIONS, question_scope("1"), CHOICES])
+        bump_versions([QUESTIONS, TAGS, question_scope("2"), tag_scope("python")])
+        bump_versions([CHOICES])
+    first, second = task.apply_async.call_args_list
+    assert first == mock.call(
+        kwargs={"paths": None, "question_uuids": ["1"], "tag_slugs": []},
+        countdown=5,
+    )
+    # configured pages are already scheduled
+    assert second.kwargs["kwargs"] == {
+        "paths": [],
+        "question_uuids": ["2"],
+        "tag_slugs": ["python"],
+    }
+
+
+def test_bump_versions_schedules_detail_page_once(settings):
+    settings.API_CACHE_WARM_DELAY = 5
+    with mock.patch("brainrefresh.questions.signals.warm_cache_task") as task:
+        bump_versions([question_scope("1")])
+        bump_versions([question_scope("1")])
+        bump_versions([question_scope("1"), question_scope("2")])
+    first, second = task.apply_async.call_args_list
+    assert first.kwargs["kwargs"]["question_uuids"] == ["1"]
+    assert second.kwargs["kwargs"]["question_uuids"] == ["2"]
+
+
+def test_bump_versions_survives_broker_failure(settings, caplog):
+    settings.API_CACHE_WARM_DELAY = 5
+    with mock.patch("brainrefresh.questions.signals.warm_cache_task") as task:
+        task.apply_async.side_effect = ConnectionError
+        bump_versions([QUESTIONS, question_scope("1")])
+        assert "Scheduling cache warming failed" in caplog.text
+        # scheduled again by the next invalidation
+        task.apply_async.side_effect = None
+        bump_versions([QUESTIONS, question_scope("1")])
+    assert task.apply_async.call_count == 2
+    assert task.apply_async.call_args.kwargs["kwargs"] == {
+        "paths": None,
+        "question_uuids": ["1"],
+        "tag_slugs": [],
+    }
+
+
+def test_get_modified_at():
+    with mock.patch("time.time", return_value=1000.5):
+        bump_versions([QUESTIONS])
+    with mock.patch("time.time", return_value=2000):
+        bump_versions([TAGS])
+    assert questions_cache.get_modified_at(get_versions([QUESTIONS])) == 1000
+    assert questions_cache.get_modified_at(get_versions([QUESTIONS, TAGS])) == 2000
+    # versions without time
+    assert questions_cache.get_modified_at(["abc", *get_versions([TAGS])]) is None
+
+
+def test_bump_versions_only_bumps_given_scopes():
+    tag_version, question_version = get_versions([TAGS, QUESTIONS])
+    bump_versions([TAGS])
+    assert get_versions([TAGS, QUESTIONS]) != [tag_version, question_version]
+    assert get_versions([QUESTIONS]) == [question_version]
+
+
+def test_cache_page_versioned():
+    calls = []
+
+    @cache_page_versioned(60, depends_on=[question_scope("{uuid}")])
+    def view(request, uuid):
+        calls.append(uuid)
+        return HttpResponse(str(len(calls)))
+
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    assert view(get_request(), uuid=1).content == b"1"
+    assert view(get_request(), uuid=1).content == b"1"
+    # unrelated scopes keep the page warm
+    bump_versions([question_scope(2), TAGS])
+    assert view(get_request(), uuid=1).content == b"1"
+    # related scope rebuilds the page
+    bump_versions([question_scope(1)])
+    assert view(get_request(), uuid=1).content == b"2"
+    assert len(calls) == 2
+
+
+def make_counting_view(depends_on):
+    calls = []
+
+    @cache_page_versioned(60, depends_on=depends_on)
+    def view(request, uuid):
+        calls.append(uuid)
+        return HttpResponse(str(len(calls)))
+
+    return view, calls
+
+
+def hold_rebuild_locks():
+    """Pretend another worker rebuilds every page"""
+    original_add = cache.add
+
+    def add(key, *args, **kwargs):
+        if key.startswith(LOCK_KEY_PREFIX):
+            return False
+        return original_add(key, *args, **kwargs)
+
+    return mock.patch.object(cache, "add", side_effect=add)
+
+
+def test_cache_page_versioned_serves_stale_page_while_rebuilt():
+    view, calls = make_counting_view([question_scope("{uuid}")])
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    assert view(get_request(), uuid=1).content == b"1"
+    bump_versions([question_scope(1)])
+    with hold_rebuild_locks():
+        assert view(get_request(), uuid=1).content == b"1"
+    assert len(calls) == 1
+    # the lock holder stores the new page
+    assert view(get_request(), uuid=1).content == b"2"
+    assert view(get_request(), uuid=1).content == b"2"
+
+
+def test_cache_page_versioned_stale_page_is_not_kept():
+    view, calls = make_counting_view([question_scope("{uuid}")])
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    response = view(get_request(), uuid=1)
+    assert "max-age=60" in response["Cache-Control"]
+    response["ETag"] = '"1"'
+    bump_versions([question_scope(1)])
+    with hold_rebuild_locks():
+        response = view(get_request(), uuid=1)
+    assert response.is_stale
+    assert "ETag" not in response
+    assert "no-cache" in response["Cache-Control"]
+
+
+def test_cache_page_versioned_releases_lock_on_error():
+    @cache_page_versioned(60, depends_on=[QUESTIONS])
+    def view(request):
+        raise ValueError
+
+    get_request = partial(RequestFactory().get, "/api/questions/")
+    with pytest.raises(ValueError):
+        view(get_request())
+    locks = [key for key in cache._cache if LOCK_KEY_PREFIX in key]  # type: ignore
+    assert not locks
+
+
+def test_cache_page_versioned_waits_without_stale_page(monkeypatch):
+    monkeypatch.setattr(questions_cache, "LOCK_WAIT", 0.1)
+    view, calls = make_counting_view([question_scope("{uuid}")])
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    with hold_rebuild_locks():
+        # nothing shows up, the page is built without the lock
+        assert view(get_request(), uuid=1).content == b"1"
+    assert len(calls) == 1
+
+
+def test_cache_page_versioned_refreshes_early():
+    view, calls = make_counting_view([QUESTIONS])
+    get_request = partial(RequestFactory().get, "/api/questions/")
+    assert view(get_request(), uuid=1).content == b"1"
+    with mock.patch.object(questions_cache, "_should_refresh_early", return_value=True):
+        assert view(get_request(), uuid=1).content == b"2"
+    assert view(get_request(), uuid=1).content == b"2"
+
+
+def test_should_refresh_early_near_expiry():
+    page = CachedPage(200, (), b"", expires_at=0, delta=0.1)
+    assert questions_cache._should_refresh_early(page)
+    page = page._replace(expires_at=float("inf"))
+    assert not questions_cache._should_refresh_early(page)
+
+
+def test_jittered_timeout():
+    timeouts = {questions_cache._jittered(1000) for _ in range(100)}
+    assert all(900 <= timeout <= 1000 for timeout in timeouts)
+    assert len(timeouts) > 1
+
+
+def test_two_tier_cache():
+    store = TwoTierCache()
+    assert store.get("key") is None
+    store.set("key", ["Accept"], 60)
+    # header lists are kept immutable
+    assert store.get("key") == ("Accept",)
+    assert cache.get("key") == ["Accept"]
+    assert store.get_stats() == {
+        "local_hits": 1,
+        "local_misses": 1,
+        "local_size": 1,
+        "shared_misses": 1,
+    }
+
+
+def test_cached_page_builds_fresh_responses():
+    response = HttpResponse(b"body", status=200, content_type="application/json")
+    response["ETag"] = '"1"'
+    page = CachedPage.from_response(response, expires_at=0, delta=0)
+    first, second = page.to_response(), page.to_response()
+    assert first is not second
+    assert first.content == b"body"
+    assert first["Content-Type"] == "application/json"
+    # validators of the current state are set by `conditional`
+    assert "ETag" not in first
+
+
+def test_two_tier_cache_fills_local_tier_from_shared():
+    store = TwoTierCache()
+    cache.set("key", 1)
+    assert store.get("key") == 1
+    cache.delete("key")
+    assert store.get("key") == 1
+    assert store.get_stats()["shared_hits"] == 1
+
+
+def test_two_tier_cache_evicts_least_recently_used(settings):
+    settings.API_LOCAL_CACHE_SIZE = 2
+    store = TwoTierCache()
+    store.set("a", 1, 60)
+    store.set("b", 2, 60)
+    store.get("a")
+    store.set("c", 3, 60)
+    cache.clear()
+    assert (store.get("a"), store.get("b"), store.get("c")) == (1, None, 3)
+
+
+def bump_shared_version(scope):
+    """Edit in another process, local versions of this one are kept"""
+    cache.set(questions_cache._version_key(scope), "other", timeout=None)
+
+
+def test_cache_page_versioned_local_hit_skips_shared_cache():
+    view, calls = make_counting_view([question_scope("{uuid}")])
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    assert view(get_request(), uuid=1).content == b"1"
+    hits = page_cache.get_stats().get("local_hits", 0)
+    with mock.patch.object(cache, "get") as get, mock.patch.object(
+        cache, "get_many"
+    ) as get_many:
+        assert view(get_request(), uuid=1).content == b"1"
+    assert not get.called and not get_many.called
+    assert page_cache.get_stats()["local_hits"] > hits
+
+
+def test_cache_page_versioned_local_tier_follows_versions():
+    view, calls = make_counting_view([question_scope("{uuid}")])
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    assert view(get_request(), uuid=1).content == b"1"
+    # edits of this process are seen at once
+    bump_versions([question_scope(1)])
+    assert view(get_request(), uuid=1).content == b"2"
+    # edits of other processes once local versions expire
+    bump_shared_version(question_scope(1))
+    assert view(get_request(), uuid=1).content == b"2"
+
+
+def test_cache_page_versioned_local_versions_expire(monkeypatch):
+    monkeypatch.setattr(questions_cache, "LOCAL_VERSION_TIMEOUT", 0)
+    view, calls = make_counting_view([question_scope("{uuid}")])
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    assert view(get_request(), uuid=1).content == b"1"
+    bump_shared_version(question_scope(1))
+    assert view(get_request(), uuid=1).content == b"2"
+
+
+def test_cache_page_versioned_without_local_tier(settings):
+    settings.API_LOCAL_CACHE_SIZE = 0
+    view, calls = make_counting_view([question_scope("{uuid}")])
+    get_request = partial(RequestFactory().get, "/api/questions/1/")
+    assert view(get_request(), uuid=1).content == b"1"
+    bump_shared_version(question_scope(1))
+    assert view(get_request(), uuid=1).content == b"2"
+    assert not page_cache.get_stats()["local_size"]
+
+
+@pytest.mark.django_db
+def test_get_cached_ids(django_assert_num_queries):
+    questions = QuestionFactory.create_batch(2, is_published=True)
+    queryset = Question.objects.published()
+    with django_assert_num_queries(1):
+        ids = get_cached_ids(queryset, depends_on=[QUESTIONS], timeout=60)
+        assert get_cached_ids(queryset, depends_on=[QUESTIONS], timeout=60) == ids
+    assert sorted(ids) == sorted(question.pk for question in questions)
+    # other filters and versions are cached separately
+    assert not get_cached_ids(queryset.filter(pk=0), depends_on=[QUESTIONS], timeout=60)
+    question = QuestionFactory(is_published=True)
+    bump_versions([QUESTIONS])
+    assert question.pk in get_cached_ids(queryset, depends_on=[QUESTIONS], timeout=60)
+
+
+@pytest.mark.django_db
+def test_question_save_invalidates_related_scopes(django_capture_on_commit_callbacks):
+    tag = TagFactory()
+    question = QuestionFactory(tags=[tag])
+    other_question = QuestionFactory(tags=[])
+    related = [QUESTIONS, TAGS, question_scope(question.uuid), tag_scope(tag.slug)]
+    unrelated = [CHOICES, question_scope(other_question.uuid)]
+    related_versions = get_versions(related)
+    unrelated_versions = get_versions(unrelated)
+    with django_capture_on_commit_callbacks(execute=True):
+        question.save()
+    new_versions = get_versions(related)
+    assert all(old != new for old, new in zip(related_versions, new_versions))
+    assert get_versions(unrelated) == unrelated_versions
+
+
+@pytest.mark.django_db
+def test_tag_rename_invalidates_old_slug(django_capture_on_commit_callbacks):
+    tag = TagFactory(label="old label")
+    question = QuestionFactory(tags=[tag])
+    old_slug = tag.slug
+    scopes = [tag_scope(old_slug), question_scope(question.uuid)]
+    versions = get_versions(scopes)
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.label = "new label"
+        tag.save()
+    assert tag.slug != old_slug
+    new_versions = get_versions(scopes)
+    assert all(old != new for old, new in zip(versions, new_versions))
+
+
+@pytest.mark.django_db
+def test_question_tags_change_invalidates_tag(django_capture_on_commit_callbacks):
+    tag = TagFactory()
+    question = QuestionFactory(tags=[])
+    [version] = get_versions([tag_scope(tag.slug)])
+    with django_capture_on_commit_callbacks(execute=True):
+        question.tags.add(tag)
+    assert get_versions([tag_scope(tag.slug)]) != [version]
+
+
+@pytest.mark.django_db
+def test_choice_save_invalidates_question(django_capture_on_commit_callbacks):
+    choice = ChoiceFactory()
+    other_question = QuestionFactory()
+    [choice_version] = get_versions([choice_scope(choice.uuid)])
+    [question_version, other_version] = get_versions(
+        [question_scope(choice.question.uuid), question_scope(other_question.uuid)]
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        choice.save()
+    assert get_versions([question_scope(choice.question.uuid)]) != [question_version]
+    assert get_versions([choice_scope(choice.uuid)]) != [choice_version]
+    assert get_versions([question_scope(other_question.uuid)]) == [other_version]
+
+
+@pytest.mark.django_db
+def test_question_delete_invalidates_choices_without_loading_question(
+    django_capture_on_commit_callbacks,
+):
+    question = QuestionFactory()
+    choices = ChoiceFactory.create_batch(3, question=question)
+    scopes = [question_scope(question.uuid)]
+    scopes += [choice_scope(choice.uuid) for choice in choices]
+    versions = get_versions(scopes)
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as context:
+            question.delete()
+    question_loads = [
+        query
+        for query in context.captured_queries
+        if query["sql"].startswith('SELECT "questions_question"')
+    ]
+    assert not question_loads
+    assert all(old != new for old, new in zip(versions, get_versions(scopes)))
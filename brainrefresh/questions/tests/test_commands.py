@@ -0,0 +1,135 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from brainrefresh.users.tests.factories import UserFactory
+
+from ..models import LanguageStats, TagStats
+from .factories import (
+    AnswerFactory,
+    ChoiceFactory,
+    Question,
+    QuestionFactory,
+    Review,
+    ReviewFactory,
+    Tag,
+    TagFactory,
+)
+
+
+@pytest.mark.django_db
+def test_refresh_tag_question_count():
+    tag = TagFactory()
+    QuestionFactory.create_batch(2, tags=[tag], is_published=True)
+    Tag.objects.update(question_count=0)
+    out = StringIO()
+    call_command("refresh_tag_question_count", stdout=out)
+    tag.refresh_from_db()
+    # Test result
+    assert tag.question_count == 2
+    assert "Updated 1 tags" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_refresh_question_is_multichoice():
+    question = QuestionFactory()
+    ChoiceFactory.create_batch(2, question=question, is_correct=True)
+    Question.objects.update(is_multichoice=False)
+    out = StringIO()
+    call_command("refresh_question_is_multichoice", stdout=out)
+    question.refresh_from_db()
+    # Test result
+    assert question.is_multichoice
+    assert "Updated 1 questions" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_questions(tmp_path):
+    user = UserFactory()
+    path = tmp_path / "questions.csv"
+    path.write_text("title,tags,choices\nCapital?,geo,*Paris|London\n,,\n")
+    out, err = StringIO(), StringIO()
+    call_command("import_questions", path, user=user.username, stdout=out, stderr=err)
+    # Test result
+    question = Question.objects.get(title="Capital?")
+    assert question.user == user
+    assert question.choices.filter(is_correct=True).get().text == "Paris"
+    assert "Imported 1 questions, 1 failed" in out.getvalue()
+    assert "Line 3" in err.getvalue()
+
+
+@pytest.mark.django_db
+def test_export_questions(tmp_path):
+    QuestionFactory(is_published=True, language=Question.Lang.RU)
+    QuestionFactory(is_published=True, language=Question.Lang.EN)
+    QuestionFactory(is_published=False, language=Question.Lang.RU)
+    path = tmp_path / "questions.ndjson.gz"
+    out = StringIO()
+    call_command("export_questions", path, language="RU", gzip=True, stdout=out)
+    # Test result
+    lines = gzip.decompress(path.read_bytes()).splitlines()
+    assert [json.loads(line)["language"] for line in lines] == ["RU"]
+    assert "Exported 1 questions" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_benchmark_renderers():
+    QuestionFactory.create_batch(3, is_published=True)
+    out = StringIO()
+    call_command("benchmark_renderers", number=1, stdout=out)
+    # Test result
+    assert "Page of 3 questions" in out.getvalue()
+    assert "JSONRenderer:" in out.getvalue()
+    assert "ORJSONRenderer:" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_warm_cache(settings):
+    QuestionFactory(is_published=True)
+    out, err = StringIO(), StringIO()
+    call_command("warm_cache", questions=10, stdout=out, stderr=err)
+    # configured pages, tags and the question in every language
+    count = len(settings.API_CACHE_WARM_PATHS) + Tag.objects.count() + 1
+    count *= len(settings.LANGUAGES)
+    assert f"Warmed {count} of {count} pages" in out.getvalue()
+    assert not err.getvalue()
+
+
+@pytest.mark.django_db
+def test_rebuild_reviews():
+    user = UserFactory()
+    question, other_question = QuestionFactory.create_batch(2)
+    for is_correct in (True, True, False):
+        AnswerFactory(user=user, question=question, is_correct=is_correct)
+    AnswerFactory(user=user, question=other_question, is_correct=True)
+    ReviewFactory(user=user, question=question, interval=100)
+    out = StringIO()
+    call_command("rebuild_reviews", batch_size=1, stdout=out)
+    # Test replayed schedules
+    assert "Rebuilt 2 reviews" in out.getvalue()
+    review = Review.objects.get(question=question)
+    assert (review.interval, review.repetitions) == (1, 0)
+    review = Review.objects.get(question=other_question)
+    assert (review.interval, review.repetitions) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_rebuild_answer_stats():
+    user = UserFactory()
+    tags = TagFactory.create_batch(2)
+    for is_correct in (True, False):
+        AnswerFactory(user=user, question__tags=tags, is_correct=is_correct)
+    AnswerFactory(user=user, question__tags=tags[:1], is_correct=True)
+    TagStats.objects.update(attempts=100)
+    LanguageStats.objects.all().delete()
+    out = StringIO()
+    call_command("rebuild_answer_stats", batch_size=1, stdout=out)
+    # Test recounted stats
+    assert "Rebuilt 2 tag and 1 language stats" in out.getvalue()
+    tag_stats = TagStats.objects.get(tag=tags[0])
+    assert (tag_stats.attempts, tag_stats.correct) == (3, 2)
+    language_stats = LanguageStats.objects.get(user=user)
+    assert (language_stats.attempts, language_stats.correct) == (3, 2)
@@ -14,6 +14,11 @@ def test_tag_detail(tag: Tag):
     assert resolve(url).view_name == "api:tag-detail"
 
 
+def test_tag_autocomplete():
+    assert reverse("api:tag-autocomplete") == "/api/tags/autocomplete/"
+    assert resolve("/api/tags/autocomplete/").view_name == "api:tag-autocomplete"
+
+
 def test_question_list():
     assert reverse("api:question-list") == "/api/questions/"
     assert resolve("/api/questions/").view_name == "api:question-list"
@@ -25,6 +30,12 @@ def test_question_detail(question: Question):
     assert resolve(url).view_name == "api:question-detail"
 
 
+def test_question_check(question: Question):
+    url = f"/api/questions/{question.uuid}/check/"
+    assert reverse("api:question-check", kwargs={"uuid": question.uuid}) == url
+    assert resolve(url).view_name == "api:question-check"
+
+
 def test_choice_list():
     url = "/api/choices/"
     assert reverse("api:choice-list") == url
@@ -46,3 +57,40 @@ def test_answer_detail(answer: Answer):
     url = f"/api/answers/{answer.uuid}/"
     assert reverse("api:answer-detail", kwargs={"uuid": answer.uuid}) == url
     assert resolve(url).view_name == "api:answer-detail"
+
+
+def test_question_export():
+    assert reverse("api:question-export") == "/api/questions/export/"
+    assert resolve("/api/questions/export/").view_name == "api:question-export"
+
+
+def test_question_random():
+    assert reverse("api:question-random") == "/api/questions/random/"
+    assert resolve("/api/questions/random/").view_name == "api:question-random"
+
+
+def test_question_search():
+    assert reverse("api:question-search") == "/api/questions/search/"
+    assert resolve("/api/questions/search/").view_name == "api:question-search"
+
+
+def test_question_import_list():
+    assert reverse("api:question-import-list") == "/api/question-imports/"
+    assert resolve("/api/question-imports/").view_name == "api:question-import-list"
+
+
+def test_question_import_detail():
+    url = "/api/question-imports/2f8a6c1e-5b7d-4c1a-9f3e-0d2b4a6c8e10/"
+    task_id = "2f8a6c1e-5b7d-4c1a-9f3e-0d2b4a6c8e10"
+    assert reverse("api:question-import-detail", kwargs={"task_id": task_id}) == url
+    assert resolve(url).view_name == "api:question-import-detail"
+
+
+def test_review_due():
+    assert reverse("api:review-due") == "/api/reviews/due/"
+    assert resolve("/api/reviews/due/").view_name == "api:review-due"
+
+
+def test_cache_stats():
+    assert reverse("api:cache-stats-list") == "/api/cache-stats/"
+    assert resolve("/api/cache-stats/").view_name == "api:cache-stats-list"
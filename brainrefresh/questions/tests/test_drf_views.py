@@ -1,11 +1,25 @@
+import gzip
+import json
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.db.models import signals
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 
 from brainrefresh.users.tests.factories import SuperUserFactory, UserFactory
 
+from ..api.pagination import LimitOffsetPagination
 from ..api.serializers import QuestionDetailSerializer, QuestionListSerializer
 from .factories import (
     Answer,
@@ -14,17 +28,29 @@ from .factories import (
     ChoiceFactory,
     Question,
     QuestionFactory,
+    Review,
+    ReviewFactory,
     TagFactory,
 )
 
 User = get_user_model()
 
 
+def disable_signals(test_case):
+    """Disconnect save and delete receivers until the end of `test_case`"""
+    for signal in (signals.post_save, signals.post_delete):
+        patchers: list[Any] = [
+            patch.object(signal, "receivers", []),
+            patch.object(signal, "sender_receivers_cache", {}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            test_case.addCleanup(patcher.stop)
+
+
 class TagViewSetTests(APITestCase):
     def setUp(self):
-        # disable signals
-        signals.post_save.receivers = []
-        signals.post_delete.receivers = []
+        disable_signals(self)
         # create test data
         self.user = UserFactory()
         self.tag_1 = TagFactory(label="Test Tag 1")
@@ -52,6 +78,28 @@ class TagViewSetTests(APITestCase):
         response = self.client.get(self.list_url)
         self.assertEqual(response.headers["Cache-Control"], "max-age=3600")
 
+    def test_autocomplete(self):
+        TagFactory(label="Other")
+        url = reverse("api:tag-autocomplete")
+        response = self.client.get(url, {"q": "test tag", "limit": 1})
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertIn(response.data[0]["slug"], [self.tag_1.slug, self.tag_2.slug])
+        self.assertEqual(
+            set(response.data[0]), {"url", "label", "slug", "question_count"}
+        )
+
+    def test_autocomplete_invalid(self):
+        url = reverse("api:tag-autocomplete")
+        response = self.client.get(url, {"limit": 100})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {"q", "limit"})
+
+    def test_list_fields(self):
+        response = self.client.get(self.list_url, {"fields": "slug,label"})
+        self.assertEqual(list(response.data[0]), ["label", "slug"])
+
     def test_retrieve(self):
         response = self.client.get(self.detail_url)
         # test response
@@ -78,9 +126,7 @@ class TagViewSetTests(APITestCase):
 
 class QuestionViewSetTests(APITestCase):
     def setUp(self):
-        # disable signals
-        signals.post_save.receivers = []
-        signals.post_delete.receivers = []
+        disable_signals(self)
         # Create a users to use for authentication
         self.user = UserFactory()
         self.user_1 = UserFactory()
@@ -117,7 +163,7 @@ class QuestionViewSetTests(APITestCase):
             "api:question-detail", kwargs={"uuid": self.question_1.uuid}
         )
         # test question data
-        self.q_data = {
+        self.q_data: dict[str, Any] = {
             "title": "What is your address?",
             "tags": [
                 {"slug": self.tag_1.slug},
@@ -128,7 +174,7 @@ class QuestionViewSetTests(APITestCase):
             "title": "What is your name?",
             "language": "RU",
         }
-        self.q_update_data = {
+        self.q_update_data: dict[str, Any] = {
             "title": "What is your age?",
             "text": "Must be a number",
             "explanation": "Amount of time that has passed since the birth of a person.",
@@ -154,6 +200,94 @@ class QuestionViewSetTests(APITestCase):
         )
         self.assertEqual(response.data["results"], serializer.data)
 
+    def test_list_parity(self):
+        """values() fast path renders the same bytes as QuestionListSerializer"""
+        self.question_2.tags.add(TagFactory(label="Ёлка"))
+        self.user.name = "Имя"
+        self.user.save()
+        response = self.client.get(self.list_url, {"limit": 50})
+        questions = (
+            Question.objects.published().select_related("user").prefetch_related("tags")
+        )
+        expected = QuestionListSerializer(
+            questions, many=True, context={"request": response.wsgi_request}
+        )
+        # Test response
+        self.assertEqual(
+            JSONRenderer().render(response.data["results"]),
+            JSONRenderer().render(expected.data),
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_list_queries(self):
+        """condition, count, page and tags inside the request savepoint"""
+        # condition is an aggregate query without cache versions
+        with self.assertNumQueries(4 + 2):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_fields(self):
+        params = {"fields": "uuid,title,tags.slug"}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.list_url, params)
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        question = next(
+            item
+            for item in response.data["results"]
+            if item["uuid"] == str(self.question_1.uuid)
+        )
+        self.assertEqual(list(question), ["uuid", "title", "tags"])
+        tag_slugs = self.question_1.tags.values_list("slug", flat=True)
+        self.assertEqual(question["tags"], [{"slug": slug} for slug in tag_slugs])
+        # creator is skipped, users are not joined
+        self.assertFalse(any("users_user" in q["sql"] for q in context))
+
+    def test_list_omit(self):
+        # savepoint, condition, count and page, tags are not fetched
+        with self.assertNumQueries(3 + 2):
+            response = self.client.get(self.list_url, {"omit": "tags,creator.name"})
+        item = response.data["results"][0]
+        self.assertNotIn("tags", item)
+        self.assertEqual(list(item["creator"]), ["username"])
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_list_fields_cache(self):
+        response = self.client.get(self.list_url, {"fields": "uuid"})
+        response_1 = self.client.get(self.list_url, {"fields": "title"})
+        self.assertEqual(list(response.data["results"][0]), ["uuid"])
+        self.assertEqual(list(response_1.data["results"][0]), ["title"])
+        cache.clear()
+
+    def test_retrieve_fields(self):
+        params = {"fields": "uuid,choices.uuid"}
+        response = self.client.get(self.detail_url, params)
+        # Test response
+        self.assertEqual(list(response.data), ["uuid", "choices"])
+        self.assertEqual(
+            {choice["uuid"] for choice in response.data["choices"]},
+            {str(self.choice1.uuid), str(self.choice2.uuid)},
+        )
+
+    def test_retrieve_omit(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.detail_url, {"omit": "tags,choices"})
+        self.assertNotIn("tags", response.data)
+        self.assertNotIn("choices", response.data)
+        self.assertIn("creator", response.data)
+        # tags are only counted by the condition aggregate
+        queries = [q["sql"] for q in context if "COUNT(DISTINCT" not in q["sql"]]
+        self.assertFalse(any("questions_tag" in sql for sql in queries))
+
+    def test_create_ignores_fields(self):
+        self.client.force_login(self.user)
+        url = f"{self.list_url}?fields=uuid"
+        response = self.client.post(url, self.q_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("title", response.data)
+
     def test_list_anon(self):
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -170,6 +304,69 @@ class QuestionViewSetTests(APITestCase):
         self.assertEqual(response_keys, keys)
         self.assertTrue(response.data["count"], 2)
 
+    def test_list_pagination_without_count(self):
+        keys = ["limit", "offset", "count", "count_type", "next", "previous"]
+        QuestionFactory.create_batch(3, is_published=True)
+        response = self.client.get(f"{self.list_url}?count=false&limit=4")
+        next_response = self.client.get(response.data["next"])
+        # Test response
+        self.assertEqual(list(response.data.keys()), keys + ["results"])
+        self.assertIsNone(response.data["count"])
+        self.assertIsNone(response.data["count_type"])
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertEqual(len(next_response.data["results"]), 1)
+        self.assertIsNone(next_response.data["next"])
+        self.assertIn("count=false", next_response.data["previous"])
+
+    def test_list_pagination_estimated_count(self):
+        QuestionFactory.create_batch(3, is_published=True)
+        url = f"{self.list_url}?count=estimated"
+        threshold = LimitOffsetPagination.exact_count_threshold
+        estimate = "brainrefresh.questions.api.pagination.get_planner_count_estimate"
+        # planner statistics of test tables are arbitrary, estimates are pinned
+        with patch(estimate, return_value=threshold - 1):
+            response = self.client.get(url)
+        # Small results are counted exactly
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(response.data["count_type"], "exact")
+        self.assertIsNone(response.data["next"])
+        # Planner estimate is used above the threshold
+        with patch(estimate, return_value=threshold):
+            response = self.client.get(url)
+        self.assertEqual(response.data["count"], threshold)
+        self.assertEqual(response.data["count_type"], "estimated")
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_list_cursor_pagination(self):
+        keys = ["limit", "next", "previous", "results"]
+        QuestionFactory.create_batch(3, is_published=True)
+        expected = list(
+            Question.objects.published()
+            .order_by("-created_at", "-id")
+            .values_list("uuid", flat=True)
+        )
+        # walk over all pages
+        uuids = []
+        url = f"{self.list_url}?pagination=cursor&limit=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(list(response.data.keys()), keys)
+            self.assertEqual(response.data["limit"], 2)
+            uuids += [question["uuid"] for question in response.data["results"]]
+            url = response.data["next"]
+        # Test results
+        self.assertEqual(uuids, [str(uuid) for uuid in expected])
+
+    def test_list_cursor_pagination_previous(self):
+        QuestionFactory.create_batch(3, is_published=True)
+        first_page = self.client.get(f"{self.list_url}?pagination=cursor&limit=2")
+        second_page = self.client.get(first_page.data["next"])
+        previous_page = self.client.get(second_page.data["previous"])
+        # Test response
+        self.assertIsNone(first_page.data["previous"])
+        self.assertEqual(previous_page.data["results"], first_page.data["results"])
+
     def test_list_filter_by_tag(self):
         # Create some data
         tag_1 = TagFactory(label="Python")
@@ -187,6 +384,29 @@ class QuestionViewSetTests(APITestCase):
         self.assertEqual(response_1.data["count"], 3)
         self.assertEqual(response_2.data["count"], 8)
 
+    def test_list_filter_by_tags(self):
+        # Create some data
+        tag_1 = TagFactory(label="Python")
+        tag_2 = TagFactory(label="Django")
+        tag_3 = TagFactory(label="Python Django")
+        QuestionFactory.create_batch(3, tags=[tag_1, tag_2], is_published=True)
+        QuestionFactory.create_batch(2, tags=[tag_2], is_published=True)
+        QuestionFactory.create_batch(4, tags=[tag_3], is_published=True)
+        slugs = f"{tag_1.slug},{tag_2.slug}"
+        # GET response
+        response_any = self.client.get(f"{self.list_url}?tags={slugs}")
+        response_all = self.client.get(f"{self.list_url}?tags={slugs}&tags_match=all")
+        response_fuzzy = self.client.get(f"{self.list_url}?tag={tag_1.slug}")
+        response_unknown = self.client.get(
+            f"{self.list_url}?tags={tag_1.slug},unknown&tags_match=all"
+        )
+        # Test response - exact slugs, no duplicated rows
+        self.assertEqual(response_any.data["count"], 5)
+        self.assertEqual(len(response_any.data["results"]), 5)
+        self.assertEqual(response_all.data["count"], 3)
+        self.assertEqual(response_fuzzy.data["count"], 7)
+        self.assertEqual(response_unknown.data["count"], 0)
+
     def test_list_filter_by_language(self):
         """Hard to test without isolating this test"""
         QuestionFactory.create_batch(3, language=Question.Lang.EN, is_published=True)
@@ -272,6 +492,107 @@ class QuestionViewSetTests(APITestCase):
         self.assertEqual(self.question_1.title, self.q_update_data["title"])
         self.assertEqual(self.question_1.tags.count(), 1)
 
+    def test_create_with_choices(self):
+        self.client.force_login(self.user)
+        choices = [
+            {"text": "Baker Street", "is_correct": True},
+            {"text": "Abbey Road", "is_correct": True},
+            {"text": "Nowhere"},
+        ]
+        data = {**self.q_data, "choices": choices}
+        response = self.client.post(self.list_url, data, format="json")
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        question = Question.objects.get(uuid=response.data["uuid"])
+        self.assertTrue(question.is_multichoice)
+        self.assertEqual(
+            set(question.choices.values_list("text", "is_correct")),
+            {("Baker Street", True), ("Abbey Road", True), ("Nowhere", False)},
+        )
+
+    def test_create_with_choices_queries(self):
+        """Choices are inserted in one statement"""
+        self.client.force_login(self.user)
+        queries = []
+        for count in (1, 10):
+            choices = [{"text": str(i)} for i in range(count)]
+            data = {**self.q_data, "choices": choices}
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.list_url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_update_choices(self):
+        self.client.force_login(self.user)
+        choices = [
+            {"uuid": self.choice1.uuid, "text": "John", "is_correct": True},
+            {"text": "Jim", "is_correct": True},
+        ]
+        data = {**self.q_update_data, "choices": choices}
+        response = self.client.put(self.detail_url, data, format="json")
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["choices"]), 2)
+        self.question_1.refresh_from_db()
+        self.assertTrue(self.question_1.is_multichoice)
+        self.assertEqual(
+            set(self.question_1.choices.values_list("text", "is_correct")),
+            {("John", True), ("Jim", True)},
+        )
+        self.assertFalse(Choice.objects.filter(pk=self.choice2.pk).exists())
+
+    def test_partial_update_choices(self):
+        self.client.force_login(self.user)
+        choices = [{"uuid": self.choice1.uuid}, {"uuid": self.choice2.uuid}]
+        data = {"choices": choices}
+        response = self.client.patch(self.detail_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.question_1.choices.count(), 2)
+        # new choices still require text
+        data = {"choices": [{"is_correct": True}]}
+        response = self.client.patch(self.detail_url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_duplicate_choices(self):
+        self.client.force_login(self.user)
+        choices = [{"uuid": self.choice1.uuid}, {"uuid": self.choice1.uuid}]
+        response = self.client.patch(
+            self.detail_url, {"choices": choices}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("choices", response.data)
+
+    def test_update_keeps_answered_choices(self):
+        self.client.force_login(self.user)
+        answer = AnswerFactory(question=self.question_1, choices=[self.choice2])
+        choices = [{"uuid": self.choice1.uuid}]
+        response = self.client.patch(
+            self.detail_url, {"choices": choices}, format="json"
+        )
+        # Test response lists the answered choice, answer history is kept
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.choice2.uuid), response.data["choices"][0])
+        self.assertEqual(list(answer.choices.all()), [self.choice2])
+
+    def test_update_without_choices_keeps_them(self):
+        self.client.force_login(self.user)
+        response = self.client.put(self.detail_url, self.q_update_data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.question_1.choices.count(), 2)
+
+    def test_update_foreign_choices(self):
+        self.client.force_login(self.user)
+        foreign_choice = ChoiceFactory()
+        choices = [{"uuid": foreign_choice.uuid, "text": "Stolen"}]
+        data = {**self.q_update_data, "choices": choices}
+        response = self.client.put(self.detail_url, data, format="json")
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("choices", response.data)
+        foreign_choice.refresh_from_db()
+        self.assertNotEqual(foreign_choice.text, "Stolen")
+
     def test_update_anon(self):
         data = {"user": self.user.pk, "title": "What is your age?"}
         response = self.client.put(self.detail_url, data, format="json")
@@ -321,12 +642,403 @@ class QuestionViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertTrue(Question.objects.filter(uuid=self.question_1.uuid).exists())
 
+    def test_check(self):
+        self.question_1.choices.update(is_correct=False)
+        correct_choice = ChoiceFactory(question=self.question_1, is_correct=True)
+        url = reverse("api:question-check", kwargs={"uuid": self.question_1.uuid})
+        data = {"choices": [{"uuid": correct_choice.uuid}]}
+        # anon can check answers
+        response = self.client.post(url, data, format="json")
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["is_correct"])
+        self.assertEqual(response.data["correct_choices"], [str(correct_choice.uuid)])
+        self.assertEqual(response.data["explanation"], self.question_1.explanation)
+        # dry run - answer is not saved
+        self.assertFalse(Answer.objects.filter(question=self.question_1).exists())
+
+    def test_check_incorrect(self):
+        self.question_1.choices.update(is_correct=False)
+        url = reverse("api:question-check", kwargs={"uuid": self.question_1.uuid})
+        data = {"choices": [{"uuid": self.choice1.uuid}]}
+        response = self.client.post(url, data, format="json")
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["is_correct"])
+        self.assertEqual(response.data["correct_choices"], [])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class ConditionalTests(APITestCase):
+    def setUp(self):
+        self.question = QuestionFactory(is_published=True)
+        self.tag = TagFactory()
+        self.question.tags.add(self.tag)
+        self.question_list_url = reverse("api:question-list")
+        self.question_detail_url = reverse(
+            "api:question-detail", kwargs={"uuid": self.question.uuid}
+        )
+        self.tag_list_url = reverse("api:tag-list")
+        self.tag_detail_url = reverse("api:tag-detail", args=[self.tag.slug])
+
+    def tearDown(self):
+        cache.clear()
+
+    def assertNotModified(self, url, etag, **params):
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def assertModified(self, url, etag, **params):
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_tag_list(self):
+        etag = self.client.get(self.tag_list_url).headers["ETag"]
+        self.assertNotModified(self.tag_list_url, etag)
+        # renamed tag changes the ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.label = "Renamed"
+            self.tag.save()
+        self.assertModified(self.tag_list_url, etag)
+
+    def test_tag_retrieve(self):
+        response = self.client.get(self.tag_detail_url)
+        self.assertNotModified(self.tag_detail_url, response.headers["ETag"])
+        # Last-Modified is the time of the latest version
+        last_modified = response.headers["Last-Modified"]
+        response = self.client.get(
+            self.tag_detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.headers["Last-Modified"], last_modified)
+
+    def test_question_list(self):
+        etag = self.client.get(self.question_list_url).headers["ETag"]
+        self.assertNotModified(self.question_list_url, etag)
+        # other filters or fields are other pages
+        self.assertModified(self.question_list_url, etag, fields="uuid")
+        # changed question changes the ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.title = "Changed"
+            self.question.save()
+        self.assertModified(self.question_list_url, etag)
+
+    def test_question_list_delete(self):
+        QuestionFactory(is_published=True)
+        etag = self.client.get(self.question_list_url).headers["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.delete()
+        self.assertModified(self.question_list_url, etag)
+
+    def test_question_list_skips_queries(self):
+        etag = self.client.get(self.question_list_url).headers["ETag"]
+        # request savepoint only
+        with self.assertNumQueries(2):
+            self.assertNotModified(self.question_list_url, etag)
+
+    def test_question_retrieve(self):
+        etag = self.client.get(self.question_detail_url).headers["ETag"]
+        self.assertNotModified(self.question_detail_url, etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.save()
+        self.assertModified(self.question_detail_url, etag)
+
+    def test_question_retrieve_not_found(self):
+        question = QuestionFactory(is_published=False)
+        url = reverse("api:question-detail", kwargs={"uuid": question.uuid})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", response.headers)
+
+    def test_question_retrieve_invalid_uuid(self):
+        url = reverse("api:question-detail", kwargs={"uuid": "not-a-uuid"})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(API_LOCAL_CACHE_SIZE=0)
+    def test_versions_read_once(self):
+        self.client.get(self.question_list_url)
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            response = self.client.get(self.question_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # shared by the ETag and the page cache key
+        get_many.assert_called_once()
+
+    def test_condition_without_versions(self):
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            }
+        ):
+            response = self.client.get(self.question_detail_url)
+            self.assertIn("Last-Modified", response.headers)
+            etag = response.headers["ETag"]
+            self.assertNotModified(self.question_detail_url, etag)
+            # from the aggregate of the question and its relations
+            ChoiceFactory(question=self.question)
+            self.assertModified(self.question_detail_url, etag)
+
+
+class QuestionExportTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.tag = TagFactory()
+        self.question = QuestionFactory(
+            is_published=True, language=Question.Lang.EN, tags=[self.tag]
+        )
+        ChoiceFactory(question=self.question, is_correct=True)
+        QuestionFactory(is_published=True, language=Question.Lang.RU)
+        QuestionFactory(is_published=False, language=Question.Lang.EN)
+        self.url = reverse("api:question-export")
+
+    def get_rows(self, content: bytes) -> list[dict]:
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {"language": "EN"})
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = self.get_rows(b"".join(response.streaming_content))
+        self.assertEqual([row["uuid"] for row in rows], [str(self.question.uuid)])
+        self.assertEqual(rows[0]["tags"], [self.tag.slug])
+        self.assertEqual(len(rows[0]["choices"]), 1)
+
+    def test_export_filter_by_tags(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {"tags": self.tag.slug})
+        rows = self.get_rows(b"".join(response.streaming_content))
+        self.assertEqual([row["uuid"] for row in rows], [str(self.question.uuid)])
+
+    def test_export_gzip(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {"compress": "gzip"})
+        # Test response
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn("questions.ndjson.gz", response["Content-Disposition"])
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(self.get_rows(content)), 2)
+
+    def test_export_anon(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class QuestionRandomTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.tag = TagFactory()
+        self.questions = QuestionFactory.create_batch(
+            5, language=Question.Lang.EN, is_published=True, tags=[self.tag]
+        )
+        for question in self.questions:
+            ChoiceFactory(question=question)
+        QuestionFactory(language=Question.Lang.RU, is_published=True, tags=[self.tag])
+        QuestionFactory(language=Question.Lang.EN, is_published=False, tags=[self.tag])
+        self.url = reverse("api:question-random")
+        self.params = {"tags": self.tag.slug, "language": "EN"}
+
+    def get_uuids(self, response) -> set[str]:
+        return {question["uuid"] for question in response.data}
+
+    def test_random(self):
+        response = self.client.get(self.url, {**self.params, "n": 3})
+        # Test response - distinct filtered questions with choices
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.get_uuids(response)), 3)
+        self.assertLessEqual(
+            self.get_uuids(response), {str(q.uuid) for q in self.questions}
+        )
+        self.assertEqual(len(response.data[0]["choices"]), 1)
+        self.assertNotIn("is_correct", response.data[0]["choices"][0])
+
+    def test_random_more_than_available(self):
+        response = self.client.get(self.url, {**self.params, "n": 50})
+        self.assertEqual(
+            self.get_uuids(response), {str(q.uuid) for q in self.questions}
+        )
+
+    def test_random_queries(self):
+        # ids, questions with users, tags and choices
+        with self.assertNumQueries(4 + 2):
+            self.client.get(self.url, {"language": "EN", "n": 3})
+
+    def test_random_exclude_answered(self):
+        answered = self.questions[:4]
+        for question in answered:
+            AnswerFactory(user=self.user, question=question)
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {**self.params, "exclude_answered": True})
+        self.assertEqual(self.get_uuids(response), {str(self.questions[4].uuid)})
+
+    def test_random_exclude_answered_anon(self):
+        response = self.client.get(self.url, {"exclude_answered": True})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_random_invalid(self):
+        response = self.client.get(self.url, {"n": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class QuestionSearchTests(APITestCase):
+    def setUp(self):
+        self.tag = TagFactory()
+        self.question = QuestionFactory(
+            title="Python decorators",
+            text="How do decorators wrap functions?",
+            language=Question.Lang.EN,
+            is_published=True,
+            tags=[self.tag],
+        )
+        self.other = QuestionFactory(
+            title="Closures",
+            text="Decorators are often closures",
+            language=Question.Lang.EN,
+            is_published=True,
+            tags=[],
+        )
+        QuestionFactory(title="Decorator draft", is_published=False)
+        self.url = reverse("api:question-search")
+
+    def test_search(self):
+        response = self.client.get(self.url, {"q": "decorator"})
+        # Test response - ranked, published only
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        results = response.data["results"]
+        self.assertEqual(
+            [result["uuid"] for result in results],
+            [str(self.question.uuid), str(self.other.uuid)],
+        )
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+        self.assertIn("<mark>decorators</mark>", results[0]["headline"])
+
+    def test_search_headline_escaped(self):
+        QuestionFactory(
+            title="Closures",
+            text='Wrap it: <img src=x onerror="alert(1)"> <b onclick=x decorators',
+            is_published=True,
+        )
+        response = self.client.get(self.url, {"q": "wrap"})
+        headline = response.data["results"][0]["headline"]
+        self.assertIn("<mark>Wrap</mark>", headline)
+        self.assertNotIn("<img", headline)
+        self.assertNotIn("<b ", headline)
+
+    def test_search_filters(self):
+        response_tag = self.client.get(
+            self.url, {"q": "decorator", "tags": self.tag.slug}
+        )
+        response_lang = self.client.get(self.url, {"q": "decorator", "language": "RU"})
+        self.assertEqual(response_tag.data["count"], 1)
+        self.assertEqual(response_lang.data["count"], 0)
+
+    def test_search_fields(self):
+        response = self.client.get(self.url, {"q": "closure", "fields": "uuid,rank"})
+        self.assertEqual(set(response.data["results"][0]), {"uuid", "rank"})
+
+    def test_search_without_query(self):
+        response = self.client.get(self.url, {"q": " "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.data)
+
+
+class QuestionImportViewSetTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.admin = SuperUserFactory()
+        self.list_url = reverse("api:question-import-list")
+        self.task_id = "2f8a6c1e-5b7d-4c1a-9f3e-0d2b4a6c8e10"
+        self.detail_url = reverse("api:question-import-detail", args=[self.task_id])
+
+    def upload(self, name="questions.jsonl", **data):
+        file = SimpleUploadedFile(name, b'{"title": "Imported"}\n')
+        return self.client.post(self.list_url, {"file": file, **data})
+
+    @patch("brainrefresh.questions.api.views.default_storage")
+    @patch("brainrefresh.questions.api.views.import_questions_task")
+    def test_create(self, task, storage):
+        storage.save.return_value = "question-imports/import.jsonl"
+        task.delay.return_value.id = self.task_id
+        task.delay.return_value.state = "PENDING"
+        self.client.force_login(self.admin)
+        response = self.upload()
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {"task_id": self.task_id, "status": "PENDING"})
+        task.delay.assert_called_once_with(
+            "question-imports/import.jsonl", self.admin.pk, "jsonl"
+        )
+
+    def test_create_unknown_format(self):
+        self.client.force_login(self.admin)
+        response = self.upload(name="questions.txt")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("format", response.data)
+
+    def test_create_user(self):
+        self.client.force_login(self.user)
+        response = self.upload()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @patch("brainrefresh.questions.api.views.import_questions_task")
+    def test_retrieve_progress(self, task):
+        progress = {"processed": 500, "created": 498, "failed": 2}
+        task.AsyncResult.return_value.state = "PROGRESS"
+        task.AsyncResult.return_value.info = progress
+        self.client.force_login(self.admin)
+        response = self.client.get(self.detail_url)
+        # Test response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "PROGRESS")
+        self.assertEqual(response.data["progress"], progress)
+        task.AsyncResult.assert_called_once_with(self.task_id)
+
+    @patch("brainrefresh.questions.api.views.import_questions_task")
+    def test_retrieve_result(self, task):
+        result = {"processed": 1, "created": 1, "failed": 0, "errors": []}
+        task.AsyncResult.return_value.state = "SUCCESS"
+        task.AsyncResult.return_value.result = result
+        self.client.force_login(self.admin)
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["result"], result)
+
+
+class CacheStatsViewSetTests(APITestCase):
+    def setUp(self):
+        self.url = reverse("api:cache-stats-list")
+
+    def test_list(self):
+        self.client.force_login(SuperUserFactory())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data),
+            {
+                "pid",
+                "local_hits",
+                "local_misses",
+                "local_size",
+                "shared_hits",
+                "shared_misses",
+            },
+        )
+
+    def test_list_user(self):
+        self.client.force_login(UserFactory())
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class ChoiceViewSetTests(APITestCase):
     def setUp(self):
-        # disable signals
-        signals.post_save.receivers = []
-        signals.post_delete.receivers = []
+        disable_signals(self)
         # Create User objects
         self.user = UserFactory()
         self.user_1 = UserFactory()
@@ -547,6 +1259,19 @@ class AnswerViewSetTests(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertEqual(len(response.data["results"]), user["answers_len"])
 
+    def test_list_fields(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.list_url, {"fields": "uuid,choices.uuid"})
+        answer = response.data["results"][0]
+        self.assertEqual(list(answer), ["uuid", "choices"])
+        self.assertTrue(all(list(choice) == ["uuid"] for choice in answer["choices"]))
+
+    def test_list_omit(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.list_url, {"omit": "choices,question"})
+        self.assertNotIn("choices", response.data["results"][0])
+        self.assertNotIn("question", response.data["results"][0])
+
     def test_list_anon(self):
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -565,6 +1290,24 @@ class AnswerViewSetTests(APITestCase):
         # Test response
         self.assertEqual(response_keys, keys)
 
+    def test_list_cursor_pagination(self):
+        self.client.force_login(self.user_1)
+        keys = ["limit", "next", "previous", "results"]
+        expected = Answer.objects.filter(user=self.user_1).order_by(
+            "-updated_at", "-id"
+        )
+        # Get API response
+        response = self.client.get(f"{self.list_url}?pagination=cursor&limit=2")
+        next_response = self.client.get(response.data["next"])
+        # Test response
+        self.assertEqual(list(response.data.keys()), keys)
+        self.assertIsNone(next_response.data["next"])
+        uuids = [
+            answer["uuid"]
+            for answer in response.data["results"] + next_response.data["results"]
+        ]
+        self.assertEqual(uuids, [str(answer.uuid) for answer in expected])
+
     def test_create(self):
         self.client.force_login(self.user)
         # Send a POST request to the create endpoint
@@ -572,14 +1315,89 @@ class AnswerViewSetTests(APITestCase):
         # Check that the response has a status code of 201 (Created)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_create_graded(self):
+        self.client.force_login(self.user)
+        question = QuestionFactory(is_published=True)
+        choices = [
+            ChoiceFactory(question=question, is_correct=True),
+            ChoiceFactory(question=question, is_correct=True),
+            ChoiceFactory(question=question, is_correct=False),
+        ]
+        cases = [
+            (choices[:2], True),
+            (choices[:1], False),  # multichoice requires every correct choice
+            (choices, False),
+        ]
+        for selected, is_correct in cases:
+            data = {
+                "question": question.uuid,
+                "choices": [{"uuid": choice.uuid} for choice in selected],
+                "is_correct": not is_correct,  # ignored, graded on server
+            }
+            response = self.client.post(self.list_url, data, format="json")
+            # Test response
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["is_correct"], is_correct)
+            self.assertEqual(
+                set(response.data["correct_choices"]),
+                {str(choice.uuid) for choice in choices[:2]},
+            )
+            self.assertEqual(response.data["explanation"], question.explanation)
+            # Test stored answer
+            answer = Answer.objects.get(uuid=response.data["uuid"])
+            self.assertEqual(answer.is_correct, is_correct)
+
+    def test_create_schedules_review(self):
+        self.client.force_login(self.user)
+        question = QuestionFactory(is_published=True)
+        choice = ChoiceFactory(question=question, is_correct=True)
+        data = {"question": question.uuid, "choices": [{"uuid": choice.uuid}]}
+        for _ in range(2):
+            response = self.client.post(self.list_url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Test one review rescheduled by both answers
+        review = Review.objects.get(user=self.user, question=question)
+        self.assertEqual((review.interval, review.repetitions), (6, 2))
+
     def test_create_anon(self):
         response = self.client.post(self.list_url, self.user_answer_data, format="json")
         # Check that the response has a status code of 201 (Created)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
     def test_create_incorrect_choice_data_and_that_is_not_gonna_be_created(self):
-        """TODO"""
-        pass
+        self.client.force_login(self.user)
+        foreign_choice = ChoiceFactory()
+        data = {
+            "question": self.user_answer_data["question"],
+            "choices": [
+                {"uuid": self.choice_by_user.uuid},
+                {"uuid": foreign_choice.uuid},
+            ],
+        }
+        answers_count = Answer.objects.count()
+        response = self.client.post(self.list_url, data, format="json")
+        # Test response lists invalid uuids only
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(foreign_choice.uuid), response.data["choices"][0])
+        self.assertNotIn(str(self.choice_by_user.uuid), response.data["choices"][0])
+        self.assertEqual(Answer.objects.count(), answers_count)
+
+    def test_create_queries_dont_depend_on_choices_count(self):
+        self.client.force_login(self.user)
+        queries_count = []
+        for size in [1, 6]:
+            question = QuestionFactory(is_published=True)
+            choices = ChoiceFactory.create_batch(size, question=question)
+            data = {
+                "question": question.uuid,
+                "choices": [{"uuid": choice.uuid} for choice in choices],
+            }
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.list_url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data["choices"]), size)
+            queries_count.append(len(context.captured_queries))
+        self.assertEqual(queries_count[0], queries_count[1])
 
     def test_retrieve(self):
         self.client.force_login(self.user)
@@ -624,3 +1442,57 @@ class AnswerViewSetTests(APITestCase):
     def test_destroy_anon(self):
         response = self.client.delete(self.detail_url_user)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ReviewViewSetTests(APITestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        now = timezone.now()
+        self.reviews = [
+            ReviewFactory(
+                user=self.user,
+                question__is_published=True,
+                due_at=now - timedelta(days=days),
+            )
+            for days in (1, 3, 2)
+        ]
+        # not due, unpublished and foreign reviews
+        ReviewFactory(
+            user=self.user, question__is_published=True, due_at=now + timedelta(1)
+        )
+        ReviewFactory(user=self.user, question__is_published=False, due_at=now)
+        ReviewFactory(question__is_published=True, due_at=now)
+        self.url = reverse("api:review-due")
+
+    def test_due(self):
+        self.client.force_login(self.user)
+        ChoiceFactory(question=self.reviews[1].question, is_correct=True)
+        response = self.client.get(self.url)
+        # Test response - most overdue first
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = [self.reviews[i].question.uuid for i in (1, 2, 0)]
+        self.assertEqual(
+            [review["question"]["uuid"] for review in response.data],
+            [str(uuid) for uuid in expected],
+        )
+        self.assertNotIn("is_correct", response.data[0]["question"]["choices"][0])
+
+    def test_due_limit(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {"n": 1})
+        self.assertEqual(len(response.data), 1)
+
+    def test_due_queries(self):
+        self.client.force_login(self.user)
+        # session, user, reviews with questions, tags and choices
+        with self.assertNumQueries(2 + 3 + 2):
+            self.client.get(self.url)
+
+    def test_due_invalid(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {"n": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_due_anon(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
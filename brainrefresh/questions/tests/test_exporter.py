@@ -0,0 +1,29 @@
+import gzip
+import json
+
+import pytest
+
+from ..exporter import iter_gzip, iter_ndjson
+from .factories import ChoiceFactory, Question, QuestionFactory, TagFactory
+
+
+@pytest.mark.django_db
+def test_iter_ndjson(django_assert_num_queries):
+    tag = TagFactory()
+    questions = QuestionFactory.create_batch(5, tags=[tag], is_published=True)
+    ChoiceFactory(question=questions[0], text="Paris", is_correct=True)
+    # one server-side cursor, tags and choices of every chunk
+    with django_assert_num_queries(1 + 3 * 2):
+        chunks = list(iter_ndjson(Question.objects.order_by("pk"), chunk_size=2))
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    # Test result
+    assert len(chunks) == 3
+    assert [row["uuid"] for row in rows] == [str(q.uuid) for q in questions]
+    assert rows[0]["tags"] == [tag.slug]
+    assert rows[0]["choices"] == [{"text": "Paris", "is_correct": True}]
+    assert rows[0]["user"] == questions[0].user.username
+
+
+def test_iter_gzip():
+    chunks = [b'{"title": "a"}\n', b"", b'{"title": "b"}\n']
+    assert gzip.decompress(b"".join(iter_gzip(chunks))) == b"".join(chunks)
@@ -0,0 +1,46 @@
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..api.fieldsets import Fieldset
+
+
+def get_fieldset(method="get", **params) -> Fieldset:
+    factory = APIRequestFactory()
+    request = Request(getattr(factory, method)("/api/questions/", params))
+    return Fieldset.from_request(request)
+
+
+def test_fieldset_all_by_default():
+    fieldset = get_fieldset(fields="")
+    assert fieldset.wants("uuid")
+    assert fieldset.nested("tags").wants("slug")
+
+
+def test_fieldset_fields():
+    fieldset = get_fieldset(fields="uuid,tags.slug,creator")
+    assert fieldset.wants("uuid")
+    assert fieldset.wants("tags")
+    assert not fieldset.wants("title")
+    assert fieldset.nested("tags").wants("slug")
+    assert not fieldset.nested("tags").wants("url")
+    # whole nested field
+    assert fieldset.nested("creator").wants("name")
+
+
+def test_fieldset_fields_with_spaces():
+    fieldset = get_fieldset(fields="uuid, title , tags.slug")
+    assert fieldset.wants("title")
+    assert fieldset.nested("tags").wants("slug")
+
+
+def test_fieldset_omit():
+    fieldset = get_fieldset(omit="creator,tags.url")
+    assert not fieldset.wants("creator")
+    assert fieldset.wants("tags")
+    assert not fieldset.nested("tags").wants("url")
+    assert fieldset.prune({"creator": 1, "uuid": 2}) == {"uuid": 2}
+
+
+def test_fieldset_ignored_on_write():
+    fieldset = get_fieldset("post", fields="uuid")
+    assert fieldset.wants("title")
@@ -0,0 +1,114 @@
+import json
+from io import StringIO
+
+import pytest
+
+from brainrefresh.users.tests.factories import UserFactory
+
+from ..importer import get_format, import_questions, read_rows
+from .factories import Choice, Question, Tag, TagFactory
+
+
+def jsonl(*rows) -> StringIO:
+    return StringIO("\n".join(json.dumps(row) for row in rows))
+
+
+def test_get_format():
+    assert get_format("questions.JSONL") == "jsonl"
+    assert get_format("questions.csv") == "csv"
+    assert get_format("questions.txt") is None
+
+
+def test_read_rows_csv():
+    file = StringIO(
+        "title,language,tags,choices\n"
+        'Capital of France?,EN,"geography, europe",*Paris|London\n'
+        "Empty,,,\n"
+    )
+    rows = list(read_rows(file, "csv"))
+    assert rows == [
+        (
+            2,
+            {
+                "title": "Capital of France?",
+                "language": "EN",
+                "tags": ["geography", "europe"],
+                "choices": [
+                    {"text": "Paris", "is_correct": True},
+                    {"text": "London", "is_correct": False},
+                ],
+            },
+        ),
+        (3, {"title": "Empty"}),
+    ]
+
+
+def test_read_rows_jsonl_errors():
+    file = StringIO('{"title": "Valid"}\n\nnot json\n[1, 2]\n')
+    rows = list(read_rows(file, "jsonl"))
+    assert [line for line, _ in rows] == [1, 3, 4]
+    assert rows[0][1] == {"title": "Valid"}
+    assert isinstance(rows[1][1], ValueError)
+    assert isinstance(rows[2][1], ValueError)
+
+
+@pytest.mark.django_db
+def test_import_questions(django_assert_max_num_queries):
+    user = UserFactory()
+    existing_tag = TagFactory(label="Python")
+    file = jsonl(
+        {
+            "title": "Pick two",
+            "is_published": True,
+            "tags": ["python", "Новый тег"],
+            "choices": [
+                {"text": "a", "is_correct": True},
+                {"text": "b", "is_correct": True},
+                {"text": "c"},
+            ],
+        },
+        {"title": "Draft", "tags": ["python"], "choices": [{"text": "a"}]},
+        {"title": ""},
+        {"title": "No tags", "language": "RU"},
+    )
+    progress = []
+    # one batch: tags, questions, choices, through rows, tag counts
+    with django_assert_max_num_queries(10):
+        result = import_questions(
+            read_rows(file, "jsonl"),
+            user,
+            on_progress=lambda *args: progress.append(args),
+        )
+    # Test result
+    assert result.processed == 4
+    assert result.created == 3
+    assert [error.line for error in result.errors] == [3]
+    assert "title" in result.errors[0].errors
+    assert progress == [(4, 3, 1)]
+    question = Question.objects.get(title="Pick two")
+    assert question.is_multichoice
+    assert question.choices.count() == 3
+    assert set(question.tags.values_list("slug", flat=True)) == {"python", "novyj-teg"}
+    assert not Question.objects.get(title="Draft").is_multichoice
+    assert Question.objects.get(title="No tags").language == Question.Lang.RU
+    existing_tag.refresh_from_db()
+    assert existing_tag.question_count == 1
+    assert Tag.objects.get(slug="novyj-teg").label == "Новый тег"
+    assert Choice.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_import_questions_batches():
+    user = UserFactory()
+    file = jsonl(*[{"title": f"Question {i}"} for i in range(5)])
+    progress = []
+    result = import_questions(
+        read_rows(file, "jsonl"),
+        user,
+        batch_size=2,
+        on_progress=lambda *args: progress.append(args),
+    )
+    # Test result
+    assert result.created == 5
+    assert progress == [(2, 2, 0), (4, 4, 0), (5, 5, 0)]
+    assert Question.objects.filter(user=user).count() == 5
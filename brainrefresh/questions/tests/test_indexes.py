@@ -0,0 +1,119 @@
+import json
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from brainrefresh.users.tests.factories import UserFactory
+
+from .factories import Answer, Question, Review
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="EXPLAIN plans are PostgreSQL only"
+    ),
+]
+
+
+def get_plan_nodes(plan: dict) -> list[dict]:
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes += get_plan_nodes(child)
+    return nodes
+
+
+def explain(queryset) -> list[dict]:
+    """Plan nodes of `queryset` with sequential scans discouraged.
+
+    With `enable_seqscan` off the planner still falls back to a sequential
+    scan when no index can serve the query, so small seeded tables are enough.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = json.loads(queryset.explain(format="json"))
+    return get_plan_nodes(plan[0]["Plan"])
+
+
+def assert_index_scan(
+    nodes: list[dict], table: str, index_prefix: str | None = None
+) -> None:
+    """No sequential scan of `table`, an index scan by `index_prefix` if given"""
+    seq_scans = [
+        node
+        for node in nodes
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] == table
+    ]
+    assert not seq_scans, f"Sequential scan on {table}"
+    index_names = [node["Index Name"] for node in nodes if "Index Name" in node]
+    assert any(name.startswith(index_prefix or "") for name in index_names)
+
+
+@pytest.fixture
+def seeded_data():
+    users = UserFactory.create_batch(5)
+    questions = Question.objects.bulk_create(
+        Question(
+            user=users[i % 5],
+            title=f"Question {i}",
+            language=Question.Lang.RU if i % 3 else Question.Lang.EN,
+            is_published=bool(i % 4),
+        )
+        for i in range(500)
+    )
+    Answer.objects.bulk_create(
+        Answer(user=users[i % 5], question=questions[i]) for i in range(500)
+    )
+    Review.objects.bulk_create(
+        Review(user=users[i % 5], question=questions[i], due_at=timezone.now())
+        for i in range(500)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE questions_question, questions_answer, questions_review")
+    return users, questions
+
+
+def test_published_feed_plan(seeded_data):
+    queryset = Question.objects.published().order_by("-created_at", "-id")[:20]
+    nodes = explain(queryset)
+    assert_index_scan(nodes, "questions_question", "question_pub_created_idx")
+
+
+def test_published_feed_by_language_plan(seeded_data):
+    queryset = (
+        Question.objects.published()
+        .filter(language=Question.Lang.EN)
+        .order_by("-created_at", "-id")[:20]
+    )
+    nodes = explain(queryset)
+    assert_index_scan(nodes, "questions_question", "question_pub_lang_created_idx")
+
+
+def test_answer_history_plan(seeded_data):
+    users, _ = seeded_data
+    queryset = Answer.objects.filter(user=users[0]).order_by("-updated_at")[:20]
+    nodes = explain(queryset)
+    assert_index_scan(nodes, "questions_answer", "answer_user_updated_idx")
+
+
+def test_review_due_plan(seeded_data):
+    users, _ = seeded_data
+    queryset = Review.objects.filter(
+        user=users[0], due_at__lte=timezone.now()
+    ).order_by("due_at")[:10]
+    nodes = explain(queryset)
+    assert_index_scan(nodes, "questions_review", "review_user_due_idx")
+
+
+def test_search_plan(seeded_data):
+    queryset = Question.objects.published().search("question 17")[:20]
+    nodes = explain(queryset)
+    # the search or the feed index, whichever the planner prefers
+    assert_index_scan(nodes, "questions_question")
+
+
+def test_uuid_lookup_plan(seeded_data):
+    _, questions = seeded_data
+    queryset = Question.objects.filter(uuid=questions[0].uuid)
+    nodes = explain(queryset)
+    assert_index_scan(nodes, "questions_question", "questions_question_uuid")
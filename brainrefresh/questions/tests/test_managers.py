@@ -1,6 +1,8 @@
+from django.db import connection
 from django.test import TestCase
 
-from .factories import Question, QuestionFactory
+from ..managers import HEADLINE_START_SEL, HEADLINE_STOP_SEL, headline_to_html
+from .factories import Question, QuestionFactory, Tag, TagFactory
 
 
 class QuestionManagerTestCase(TestCase):
@@ -15,3 +17,101 @@ class QuestionManagerTestCase(TestCase):
         self.assertIn(self.question1, published_questions)
         self.assertIn(self.question3, published_questions)
         self.assertNotIn(self.question2, published_questions)
+
+
+class QuestionQuerySetTagsTestCase(TestCase):
+    def setUp(self):
+        self.tag_1 = TagFactory(label="python")
+        self.tag_2 = TagFactory(label="django")
+        self.question_1 = QuestionFactory(tags=[self.tag_1, self.tag_2])
+        self.question_2 = QuestionFactory(tags=[self.tag_2])
+        self.question_3 = QuestionFactory(tags=[TagFactory(label="flask")])
+
+    def test_with_tags_any(self):
+        questions = Question.objects.all().with_tags([self.tag_1.slug, self.tag_2.slug])
+        self.assertEqual(set(questions), {self.question_1, self.question_2})
+        self.assertEqual(questions.count(), 2)
+
+    def test_with_tags_all(self):
+        slugs = [self.tag_1.slug, self.tag_2.slug]
+        questions = Question.objects.all().with_tags(slugs, match_all=True)
+        self.assertEqual(list(questions), [self.question_1])
+
+    def test_with_tags_empty(self):
+        self.assertEqual(Question.objects.all().with_tags([]).count(), 3)
+
+    def test_with_tag_like(self):
+        questions = Question.objects.all().with_tag_like("ang")
+        self.assertEqual(set(questions), {self.question_1, self.question_2})
+
+
+class QuestionQuerySetSearchTestCase(TestCase):
+    def setUp(self):
+        self.en_title = QuestionFactory(
+            title="Running processes", text="", explanation="", language="EN"
+        )
+        self.en_explanation = QuestionFactory(
+            title="Signals", text="", explanation="A process runs", language="EN"
+        )
+
+    def test_search_stems(self):
+        self.assertEqual(
+            list(Question.objects.search("process")),
+            [self.en_title, self.en_explanation],
+        )
+        self.assertEqual(
+            list(Question.objects.search("process -signal")), [self.en_title]
+        )
+
+    def test_search_by_language(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW server_encoding")
+            if cursor.fetchone()[0] != "UTF8":
+                self.skipTest("Non-ASCII text needs a UTF8 database")
+        question = QuestionFactory(
+            title="Кошки", text="Сколько лап у кошки?", explanation="", language="RU"
+        )
+        self.assertEqual(list(Question.objects.search("кошка")), [question])
+        self.assertEqual(list(Question.objects.search("кошка", language="EN")), [])
+
+    def test_search_rank_and_headline(self):
+        first, second = Question.objects.search("process")
+        self.assertGreater(first.rank, second.rank)
+        start, stop = HEADLINE_START_SEL, HEADLINE_STOP_SEL
+        self.assertIn(f"{start}processes{stop}", first.headline)
+        self.assertIn(f"{start}process{stop}", second.headline)
+
+    def test_headline_to_html(self):
+        headline = f"a<b & {HEADLINE_START_SEL}c{HEADLINE_STOP_SEL}"
+        self.assertEqual(headline_to_html(headline), "a&lt;b &amp; <mark>c</mark>")
+
+    def test_search_vector_follows_bulk_updates(self):
+        Question.objects.filter(pk=self.en_title.pk).update(title="Threads")
+        self.assertEqual(
+            list(Question.objects.search("process")), [self.en_explanation]
+        )
+        self.assertEqual(list(Question.objects.search("thread")), [self.en_title])
+
+
+class TagQuerySetAutocompleteTestCase(TestCase):
+    def setUp(self):
+        self.python = TagFactory(label="Python", question_count=1)
+        self.django = TagFactory(label="Django", question_count=2)
+        self.django_rest = TagFactory(label="Django REST", question_count=5)
+        self.cats = TagFactory(label="Кошки")
+
+    def test_autocomplete(self):
+        self.assertEqual(list(Tag.objects.autocomplete("pyth")), [self.python])
+
+    def test_autocomplete_ranks_popular_first(self):
+        tags = list(Tag.objects.autocomplete("django"))
+        self.assertEqual(tags, [self.django_rest, self.django])
+        self.assertEqual(list(Tag.objects.autocomplete("django", limit=1)), tags[:1])
+
+    def test_autocomplete_transliterates(self):
+        self.assertEqual(self.cats.slug, "koshki")
+        self.assertEqual(list(Tag.objects.autocomplete("kosh")), [self.cats])
+        self.assertEqual(list(Tag.objects.autocomplete("кош")), [self.cats])
+
+    def test_autocomplete_typo(self):
+        self.assertEqual(list(Tag.objects.autocomplete("pyhton")), [self.python])
@@ -1,7 +1,9 @@
 from uuid import UUID
 
+from django.db import connection
 from django.db.models import ProtectedError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.text import slugify
 
@@ -70,21 +72,73 @@ class TagTests(TestCase):
         self.tag.save()
         self.assertEqual(previous_slug, self.tag.slug)
 
-    def test_propery_question_count(self):
+    def test_question_count(self):
         # create new tag
         new_tag = TagFactory(label=self.tag_data["label"])
         # test existing tags
         self.assertEqual(self.tag.question_count, 0)
         self.assertEqual(new_tag.question_count, 0)
         # update question tags
-        questions = QuestionFactory.create_batch(5)
+        questions = QuestionFactory.create_batch(5, tags=[], is_published=True)
+        QuestionFactory(tags=[self.tag, new_tag], is_published=False)
         for question in questions:
             question.tags.add(self.tag)
         questions[0].tags.add(new_tag)
-        # test Tag question_count
+        # test Tag question_count - unpublished questions are not counted
+        self.tag.refresh_from_db()
+        new_tag.refresh_from_db()
         self.assertEqual(self.tag.question_count, 5)
         self.assertEqual(new_tag.question_count, 1)
 
+    def test_question_count_tags_change(self):
+        question = QuestionFactory(tags=[], is_published=True)
+        question.tags.add(self.tag)
+        self.tag.questions.add(QuestionFactory(tags=[], is_published=True))
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 2)
+        # remove and clear
+        question.tags.remove(self.tag)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 1)
+        self.tag.questions.clear()
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 0)
+
+    def test_question_count_remove_unlinked(self):
+        linked, unlinked = QuestionFactory.create_batch(2, tags=[], is_published=True)
+        linked.tags.add(self.tag)
+        # removing missing links changes nothing
+        unlinked.tags.remove(self.tag)
+        self.tag.questions.remove(unlinked)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 1)
+        self.tag.questions.remove(linked, unlinked)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 0)
+
+    def test_question_count_publish_change(self):
+        question = QuestionFactory(tags=[self.tag], is_published=False)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 0)
+        # publish
+        question.is_published = True
+        question.save()
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 1)
+        # unpublish
+        question.is_published = False
+        question.save()
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 0)
+
+    def test_question_count_question_delete(self):
+        question = QuestionFactory(tags=[self.tag], is_published=True)
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 1)
+        question.delete()
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.question_count, 0)
+
 
 class QuestionTests(TestCase):
     def setUp(self):
@@ -193,6 +247,68 @@ class ChoiceTests(TestCase):
             str(self.choice), f"{self.question.title} : {str(self.choice.uuid)}"
         )
 
+    def test_question_is_multichoice(self):
+        question = QuestionFactory()
+        choice = ChoiceFactory(question=question, is_correct=True)
+        question.refresh_from_db()
+        self.assertFalse(question.is_multichoice)
+        # create
+        ChoiceFactory(question=question, is_correct=True)
+        question.refresh_from_db()
+        self.assertTrue(question.is_multichoice)
+        # update
+        choice.is_correct = False
+        choice.save()
+        question.refresh_from_db()
+        self.assertFalse(question.is_multichoice)
+        choice.is_correct = True
+        choice.save()
+        question.refresh_from_db()
+        self.assertTrue(question.is_multichoice)
+        # delete
+        choice.delete()
+        question.refresh_from_db()
+        self.assertFalse(question.is_multichoice)
+
+    def test_question_is_multichoice_choice_moved(self):
+        question = QuestionFactory()
+        choice = ChoiceFactory(question=question, is_correct=True)
+        ChoiceFactory(question=question, is_correct=True)
+        new_question = QuestionFactory()
+        # move choice to other question
+        choice.question = new_question
+        choice.save()
+        question.refresh_from_db()
+        self.assertFalse(question.is_multichoice)
+
+    def test_question_is_multichoice_loaded_question(self):
+        question = QuestionFactory()
+        choice = ChoiceFactory(question=question, is_correct=True)
+        ChoiceFactory(question=question, is_correct=True)
+        self.assertTrue(question.is_multichoice)
+        # later save() of the loaded question keeps the refreshed flag
+        choice.delete()
+        question.save()
+        question.refresh_from_db()
+        self.assertFalse(question.is_multichoice)
+
+    def test_question_is_multichoice_bulk_delete(self):
+        question = QuestionFactory()
+        choices = ChoiceFactory.create_batch(3, question=question, is_correct=True)
+        Choice.objects.filter(pk=choices[0].pk).delete()
+        question.refresh_from_db()
+        self.assertTrue(question.is_multichoice)
+        # related manager querysets
+        question.choices.filter(pk=choices[1].pk).delete()
+        question.refresh_from_db()
+        self.assertFalse(question.is_multichoice)
+
+    def test_question_save_doesnt_count_choices(self):
+        with CaptureQueriesContext(connection) as context:
+            self.question.save()
+        queries = [query["sql"] for query in context.captured_queries]
+        self.assertFalse([sql for sql in queries if "questions_choice" in sql])
+
 
 class AnswerTests(TestCase):
     def setUp(self):
@@ -1,7 +1,38 @@
+from datetime import timedelta
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from brainrefresh.users.tests.factories import UserFactory
 
-from ..services import check_question_is_multichoice
-from .factories import ChoiceFactory, QuestionFactory
+from ..models import LanguageStats, TagStats
+from ..services import (
+    INITIAL_REVIEW_STATE,
+    MIN_EASE,
+    ReviewState,
+    change_answer_stats,
+    check_question_is_multichoice,
+    get_user_stats,
+    grade_answer,
+    next_review_state,
+    record_review,
+    refresh_questions_is_multichoice,
+    refresh_tags_question_count,
+    set_question_choices,
+    update_questions_is_published,
+)
+from .factories import (
+    Answer,
+    AnswerFactory,
+    ChoiceFactory,
+    Question,
+    QuestionFactory,
+    Review,
+    Tag,
+    TagFactory,
+)
 
 
 @pytest.mark.django_db
@@ -24,3 +55,214 @@ def test_check_question_is_multichoice_false():
     # Test result
     assert isinstance(result, bool)
     assert not result
+
+
+@pytest.mark.django_db
+def test_grade_answer():
+    question = QuestionFactory()
+    correct = ChoiceFactory.create_batch(2, question=question, is_correct=True)
+    incorrect = ChoiceFactory(question=question, is_correct=False)
+    correct_uuids = [choice.uuid for choice in correct]
+    # Test result
+    grade = grade_answer(question, correct_uuids)
+    assert grade.is_correct
+    assert set(grade.correct_choices) == set(correct_uuids)
+    assert grade.explanation == question.explanation
+    assert not grade_answer(question, correct_uuids[:1]).is_correct
+    assert not grade_answer(question, correct_uuids + [incorrect.uuid]).is_correct
+    assert not grade_answer(question, []).is_correct
+
+
+@pytest.mark.django_db
+def test_refresh_tags_question_count():
+    tags = TagFactory.create_batch(2)
+    QuestionFactory.create_batch(3, tags=tags, is_published=True)
+    QuestionFactory.create_batch(2, tags=tags[:1], is_published=False)
+    Tag.objects.update(question_count=100)
+    # Test result
+    assert refresh_tags_question_count() == 2
+    assert [tag.question_count for tag in Tag.objects.order_by("pk")] == [3, 3]
+
+
+@pytest.mark.django_db
+def test_update_questions_is_published():
+    tag = TagFactory()
+    QuestionFactory.create_batch(3, tags=[tag], is_published=False)
+    QuestionFactory(tags=[tag], is_published=True)
+    # publish
+    assert update_questions_is_published(Question.objects.all(), True) == 3
+    tag.refresh_from_db()
+    assert tag.question_count == 4
+    # unpublish
+    assert update_questions_is_published(Question.objects.all(), False) == 4
+    tag.refresh_from_db()
+    assert tag.question_count == 0
+
+
+@pytest.mark.django_db
+def test_refresh_questions_is_multichoice():
+    question = QuestionFactory()
+    ChoiceFactory.create_batch(2, question=question, is_correct=True)
+    other_question = QuestionFactory()
+    ChoiceFactory.create_batch(2, question=other_question, is_correct=False)
+    Question.objects.update(is_multichoice=False)
+    # Test result
+    assert refresh_questions_is_multichoice() == 2
+    question.refresh_from_db()
+    other_question.refresh_from_db()
+    assert question.is_multichoice
+    assert not other_question.is_multichoice
+
+
+@pytest.mark.django_db
+def test_set_question_choices(django_assert_max_num_queries):
+    question = QuestionFactory()
+    kept, changed, deleted = ChoiceFactory.create_batch(
+        3, question=question, is_correct=False
+    )
+    choices_data = [
+        {"uuid": kept.uuid, "text": kept.text, "is_correct": kept.is_correct},
+        {"uuid": changed.uuid, "is_correct": True},
+        {"text": "new", "is_correct": True},
+    ]
+    choices = list(question.choices.all())
+    # insert, update, delete with its cascades and signals in a savepoint
+    with django_assert_max_num_queries(8):
+        result = set_question_choices(question, choices_data, choices=choices)
+    # Test result
+    assert result
+    assert set(question.choices.values_list("pk", flat=True)) - {
+        kept.pk,
+        changed.pk,
+    } == {question.choices.get(text="new").pk}
+    changed.refresh_from_db()
+    assert changed.is_correct
+
+
+def test_next_review_state():
+    state = INITIAL_REVIEW_STATE
+    intervals = []
+    for _ in range(3):
+        state = next_review_state(state, True)
+        intervals.append(state.interval)
+    # Test intervals grow by ease
+    assert intervals == [1, 6, 15]
+    assert state.repetitions == 3
+    assert state.ease == pytest.approx(INITIAL_REVIEW_STATE.ease)
+    # Test failure resets the schedule and lowers ease
+    failed = next_review_state(state, False)
+    assert failed.interval == 1
+    assert failed.repetitions == 0
+    assert failed.ease < state.ease
+    assert next_review_state(ReviewState(MIN_EASE, 1, 0), False).ease == MIN_EASE
+
+
+@pytest.mark.django_db
+def test_record_review():
+    user = UserFactory()
+    question = QuestionFactory()
+    answered_at = timezone.now()
+    review = record_review(user, question, True, answered_at)
+    # Test created review
+    assert (review.interval, review.repetitions) == (1, 1)
+    assert review.due_at == answered_at + timedelta(days=1)
+    # Test updated review
+    review = record_review(user, question, True, answered_at)
+    assert Review.objects.get().pk == review.pk
+    assert (review.interval, review.repetitions) == (6, 2)
+    assert review.due_at == answered_at + timedelta(days=6)
+
+
+@pytest.mark.django_db
+def test_change_answer_stats():
+    user = UserFactory()
+    tags = TagFactory.create_batch(2)
+    question = QuestionFactory(tags=tags, language=Question.Lang.RU)
+    answers = [
+        AnswerFactory(user=user, question=question, is_correct=is_correct)
+        for is_correct in (True, False)
+    ]
+    # Test stats of created answers
+    tag_stats = TagStats.objects.get(user=user, tag=tags[0])
+    assert (tag_stats.attempts, tag_stats.correct) == (2, 1)
+    assert tag_stats.last_attempt_at == answers[1].created_at
+    language_stats = LanguageStats.objects.get(user=user)
+    assert (language_stats.language, language_stats.attempts) == ("RU", 2)
+    assert language_stats.correct == 1
+    # Test stats of deleted answer
+    answers[0].delete()
+    tag_stats = TagStats.objects.get(user=user, tag=tags[1])
+    assert (tag_stats.attempts, tag_stats.correct) == (1, 0)
+    # Test answers without stats are not subtracted
+    TagStats.objects.update(attempts=0, correct=0)
+    change_answer_stats(answers[1], -1)
+    assert TagStats.objects.filter(attempts=0).count() == 2
+
+
+@pytest.mark.django_db
+def test_change_answer_stats_clamps_fields():
+    answer = AnswerFactory(is_correct=True)
+    LanguageStats.objects.update(attempts=2, correct=0)
+    answer.delete()
+    # Test attempts are subtracted though correct is already 0
+    stats = LanguageStats.objects.get()
+    assert (stats.attempts, stats.correct) == (1, 0)
+
+
+@pytest.mark.django_db
+def test_change_answer_stats_question_delete():
+    answer = AnswerFactory(is_correct=True)
+    answer.question.delete()
+    # Test cascaded answers are removed from stats
+    assert not Answer.objects.exists()
+    assert TagStats.objects.filter(attempts__gt=0).count() == 0
+    assert LanguageStats.objects.get().attempts == 0
+
+
+@pytest.mark.django_db
+def test_change_answer_stats_question_delete_queries():
+    users = UserFactory.create_batch(2)
+    question = QuestionFactory(tags=TagFactory.create_batch(2))
+    other = AnswerFactory(user=users[0], question__tags=question.tags.all())
+    for user in users:
+        for is_correct in (True, False, True):
+            AnswerFactory(user=user, question=question, is_correct=is_correct)
+    # Test cascaded answers are removed at once, not per answer
+    with CaptureQueriesContext(connection) as context:
+        question.delete()
+    updates = [query["sql"] for query in context if query["sql"].startswith("UPDATE")]
+    assert len([sql for sql in updates if "stats" in sql]) == 2
+    stats = TagStats.objects.filter(user=users[0])
+    assert {(s.attempts, s.correct) for s in stats} == {(1, int(other.is_correct))}
+    assert not TagStats.objects.filter(user=users[1], attempts__gt=0).exists()
+    assert not LanguageStats.objects.filter(user=users[1], attempts__gt=0).exists()
+
+
+@pytest.mark.django_db
+def test_change_answer_stats_user_delete():
+    user = UserFactory()
+    AnswerFactory.create_batch(3, user=user)
+    with CaptureQueriesContext(connection) as context:
+        user.delete()
+    # Test stats are deleted with the user, not updated per answer
+    assert not TagStats.objects.exists()
+    assert not any(query["sql"].startswith("UPDATE") for query in context)
+
+
+@pytest.mark.django_db
+def test_get_user_stats():
+    user = UserFactory()
+    tag = TagFactory()
+    AnswerFactory(user=user, question__tags=[tag], is_correct=True)
+    AnswerFactory(user=user, question__tags=[tag], is_correct=False)
+    AnswerFactory(user=user, question__language=Question.Lang.RU, is_correct=True)
+    AnswerFactory()
+    stats = get_user_stats(user)
+    # Test totals over languages
+    assert (stats.attempts, stats.correct) == (3, 2)
+    assert stats.accuracy == pytest.approx(2 / 3)
+    assert [stats.language for stats in stats.languages] == ["EN", "RU"]
+    # Test most attempted tags first
+    assert stats.tags[0].tag == tag
+    assert stats.tags[0].accuracy == 0.5
+    assert get_user_stats(UserFactory()).accuracy is None
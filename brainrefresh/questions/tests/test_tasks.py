@@ -0,0 +1,71 @@
+import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from brainrefresh.users.tests.factories import UserFactory
+
+from ..cache import page_cache
+from ..tasks import import_questions_task, warm_cache_task
+from ..warming import get_host
+from .factories import Question, QuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_import_questions_task():
+    user = UserFactory()
+    content = ContentFile(b'{"title": "Imported"}\n{"title": ""}\n')
+    path = default_storage.save("question-imports/test.jsonl", content)
+    result = import_questions_task(path, user.pk, "jsonl")
+    # Test result
+    assert result["processed"] == 2
+    assert result["created"] == 1
+    assert result["failed"] == 1
+    assert result["errors"][0]["line"] == 2
+    assert Question.objects.get(title="Imported").user == user
+    assert not default_storage.exists(path)
+
+
+def test_warm_cache_task(settings):
+    settings.API_CACHE_WARM_PATHS = ["/api/tags/", "/api/questions/?language=EN"]
+    question = QuestionFactory(is_published=True)
+    result = warm_cache_task(question_uuids=[str(question.uuid)])
+    in_languages = {"en": 200, "ru": 200}
+    assert result == {
+        "/api/tags/": in_languages,
+        "/api/questions/?language=EN": in_languages,
+        f"/api/questions/{question.uuid}/": in_languages,
+    }
+
+
+def test_warm_cache_task_paths():
+    # pages are requested anonymously
+    result = warm_cache_task(paths=["/api/question-imports/"])
+    assert result == {"/api/question-imports/": {"en": 403, "ru": 403}}
+
+
+def test_warm_cache_task_matches_frontend_requests(client, settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    QuestionFactory(is_published=True)
+    path = "/api/questions/?limit=10"
+    try:
+        assert warm_cache_task(paths=[path]) == {path: {"en": 200, "ru": 200}}
+        for accept_language in ["en-US,en;q=0.9", "ru-RU,ru;q=0.9"]:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(
+                    path,
+                    HTTP_ACCEPT="*/*",
+                    HTTP_ACCEPT_LANGUAGE=accept_language,
+                    HTTP_HOST=get_host(),
+                )
+            assert response.status_code == 200
+            # served from the cache
+            assert not any("questions_question" in query["sql"] for query in context)
+    finally:
+        cache.clear()
+        page_cache.clear()
@@ -0,0 +1,74 @@
+"""Re-render high-traffic API pages into the cache.
+
+Pages are built by calling the resolved views with an anonymous request
+carrying the headers of the frontend, so they are stored under the same cache
+keys as the pages requested by anonymous users. Cached pages vary on the
+headers set by the views, e.g. `Vary: Accept`, and on the active language, so
+every page is rendered once per language of `LANGUAGES`, activated from
+`Accept-Language` like `LocaleMiddleware` does.
+"""
+import logging
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve, reverse
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# detail pages warmed after a single invalidation
+MAX_DETAIL_PAGES = 50
+# sent by `fetch()` of the frontend without an explicit Accept header
+ACCEPT = "*/*"
+
+
+def get_host() -> str:
+    # cache keys include the host of the request
+    hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+    return (hosts or ["localhost"])[0]
+
+
+def get_detail_paths(
+    question_uuids: Iterable = (), tag_slugs: Iterable[str] = ()
+) -> list[str]:
+    return [
+        *[reverse("api:tag-detail", args=[slug]) for slug in tag_slugs],
+        *[reverse("api:question-detail", args=[uuid]) for uuid in question_uuids],
+    ]
+
+
+def warm_path(factory: RequestFactory, path: str, language: str) -> int:
+    """Render `path` in `language` into the cache, return the status code"""
+    request = factory.get(
+        path, secure=settings.SESSION_COOKIE_SECURE, HTTP_ACCEPT_LANGUAGE=language
+    )
+    request.user = AnonymousUser()
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return 404
+    language = translation.get_language_from_request(request)
+    try:
+        with translation.override(language):
+            response = match.func(request, *match.args, **match.kwargs)
+            # DRF responses are stored in the cache once rendered
+            if hasattr(response, "render") and callable(response.render):
+                response.render()
+    except Exception:
+        logger.exception("Warming %s failed", path)
+        return 500
+    return response.status_code
+
+
+def warm_paths(paths: Iterable[str]) -> dict[str, dict[str, int]]:
+    """Request `paths` in every language, return their response status codes"""
+    factory = RequestFactory(HTTP_HOST=get_host(), HTTP_ACCEPT=ACCEPT)
+    return {
+        path: {
+            language: warm_path(factory, path, language)
+            for language, _ in settings.LANGUAGES
+        }
+        for path in paths
+    }
@@ -1,10 +1,15 @@
 from django.contrib.auth import get_user_model
+from drf_spectacular.utils import extend_schema
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, UpdateModelMixin
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from brainrefresh.questions.api.serializers import UserStatsSerializer
+from brainrefresh.questions.services import get_user_stats
+
 from .serializers import UserSerializer
 
 User = get_user_model()
@@ -23,3 +28,12 @@ class UserViewSet(RetrieveModelMixin, ListModelMixin, UpdateModelMixin, GenericV
     def me(self, request):
         serializer = UserSerializer(request.user, context={"request": request})
         return Response(status=status.HTTP_200_OK, data=serializer.data)
+
+    @extend_schema(responses=UserStatsSerializer)
+    @action(detail=False, url_path="me/stats", permission_classes=[IsAuthenticated])
+    def me_stats(self, request):
+        """Answer accuracy of the current user by language and tag"""
+        serializer = UserStatsSerializer(
+            get_user_stats(request.user), context={"request": request}
+        )
+        return Response(status=status.HTTP_200_OK, data=serializer.data)
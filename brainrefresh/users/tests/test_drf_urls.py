@@ -19,3 +19,8 @@ def test_user_list():
 def test_user_me():
     assert reverse("api:user-me") == "/api/users/me/"
     assert resolve("/api/users/me/").view_name == "api:user-me"
+
+
+def test_user_me_stats():
+    assert reverse("api:user-me-stats") == "/api/users/me/stats/"
+    assert resolve("/api/users/me/stats/").view_name == "api:user-me-stats"
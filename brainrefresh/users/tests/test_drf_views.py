@@ -1,5 +1,6 @@
 from django.test import RequestFactory
 
+from brainrefresh.questions.tests.factories import AnswerFactory
 from brainrefresh.users.api.views import UserViewSet
 from brainrefresh.users.models import User
 
@@ -28,3 +29,23 @@ class TestUserViewSet:
             "name": user.name,
             "url": f"http://testserver/api/users/{user.username}/",
         }
+
+    def test_me_stats(self, user: User, rf: RequestFactory, django_assert_num_queries):
+        view = UserViewSet()
+        answer = AnswerFactory(user=user, is_correct=True)
+        AnswerFactory.create_batch(2, user=user, question=answer.question)
+        request = rf.get("/fake-url/")
+        request.user = user
+
+        view.request = request
+
+        # language and tag stats, whatever the answer count
+        with django_assert_num_queries(2):
+            response = view.me_stats(request)
+
+        tags_count = answer.question.tags.count()
+        assert response.data["attempts"] == 3
+        assert response.data["languages"][0]["language"] == "EN"
+        assert len(response.data["tags"]) == tags_count
+        assert response.data["tags"][0]["attempts"] == 3
+        assert set(response.data["tags"][0]["tag"]) == {"url", "label", "slug"}
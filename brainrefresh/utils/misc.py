@@ -1,20 +1,57 @@
 import re
+from collections.abc import Callable
+from uuid import uuid4
 
+from django.db import IntegrityError, transaction
 from django.utils.text import slugify
 from transliterate import translit
 
 
+def make_slug(field: str) -> str:
+    if not field.isascii():
+        field = translit(field, "ru", reversed=True)  # It'll fix ru unicode titles
+    return slugify(field)
+
+
 def get_unique_slug(cls, field: str) -> str:
-    field = translit(field, "ru", reversed=True)  # It'll fix ru unicode titles
-    slug = slugify(field)
+    """Return `slug` or the first free `slug-N` of any model with a `slug` field.
+
+    Taken candidates are fetched with one prefix query. Fields without
+    sluggable characters, e.g. emoji only, get a random slug.
+    """
+    slug = make_slug(field) or uuid4().hex[:8]
+    candidate = re.compile(rf"{re.escape(slug)}(-\d+)?")
+    taken = {
+        taken_slug
+        for taken_slug in cls.objects.filter(slug__startswith=slug).values_list(
+            "slug", flat=True
+        )
+        if candidate.fullmatch(taken_slug)
+    }
     unique_slug = slug
     num = 1
-    while cls.objects.filter(slug=unique_slug).exists():
+    while unique_slug in taken:
         unique_slug = f"{slug}-{num}"
         num += 1
     return unique_slug
 
 
+def save_with_unique_slug(instance, field: str, save: Callable, retries: int = 3):
+    """Set unique slug of `instance` from `field` and call `save`.
+
+    Unique constraint on `slug` guards against concurrent inserts -
+    on IntegrityError the slug is picked again.
+    """
+    for attempt in range(retries):
+        instance.slug = get_unique_slug(type(instance), field)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            if attempt == retries - 1:
+                raise
+
+
 def capitalize_str(s: str) -> str:
     return " ".join([w.capitalize() for w in s.split(" ")]).strip()
 
@@ -0,0 +1,38 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson, output matches the stdlib one.
+
+    UUIDs, datetimes and dict subclasses are encoded natively, other types
+    (lazy strings, decimals, ...) go through the DRF encoder. Falls back to
+    JSONRenderer without orjson, for indented or ASCII-only output and for
+    integers beyond 64 bits, which orjson can't encode. Unlike the strict
+    JSONRenderer, which raises ValueError, NaN and infinity render as null.
+    """
+
+    encoder = JSONEncoder()
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if orjson is None or indent is not None or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=self.options)
+        except orjson.JSONEncodeError:
+            # integers beyond 64 bits, errors of other types are raised again
+            return super().render(data, accepted_media_type, renderer_context)
+        # escape line separators for JavaScript, as JSONRenderer does
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
@@ -1,9 +1,17 @@
+from unittest import mock
+
 import pytest
+from django.db import IntegrityError
 from django.utils.text import slugify
 from transliterate import translit
 
 from brainrefresh.questions.models import Tag
-from brainrefresh.utils.misc import capitalize_slug, capitalize_str, get_unique_slug
+from brainrefresh.utils.misc import (
+    capitalize_slug,
+    capitalize_str,
+    get_unique_slug,
+    save_with_unique_slug,
+)
 
 
 def model_slug_test_generator(cls, test_slug: str, create=5) -> None:
@@ -26,6 +34,42 @@ def test_get_unique_slug() -> None:
         model_slug_test_generator(Tag, test_slug)
 
 
+@pytest.mark.django_db
+def test_get_unique_slug_single_query(django_assert_num_queries) -> None:
+    for slug in ["python", "python-1", "python-3", "python-django", "pythonic"]:
+        Tag.objects.create(label=slug, slug=slug)
+    with django_assert_num_queries(1):
+        assert get_unique_slug(Tag, "Python") == "python-2"
+    assert get_unique_slug(Tag, "python django") == "python-django-1"
+    assert get_unique_slug(Tag, "пайтон") == "pajton"
+
+
+@pytest.mark.django_db
+def test_get_unique_slug_without_sluggable_characters(
+    django_assert_num_queries,
+) -> None:
+    Tag.objects.create(label="python", slug="python")
+    with django_assert_num_queries(1) as context:
+        slug = get_unique_slug(Tag, "🐍 !!")
+    assert len(slug) == 8
+    assert f"{slug}%" in context.captured_queries[0]["sql"]
+    assert get_unique_slug(Tag, "🐍 !!") != slug
+
+
+@pytest.mark.django_db
+def test_save_with_unique_slug_retries_on_conflict() -> None:
+    tag = Tag(label="python")
+    save = mock.Mock(side_effect=[IntegrityError, None])
+    save_with_unique_slug(tag, tag.label, save)
+    assert save.call_count == 2
+    assert tag.slug == "python"
+
+    save = mock.Mock(side_effect=IntegrityError)
+    with pytest.raises(IntegrityError):
+        save_with_unique_slug(tag, tag.label, save, retries=2)
+    assert save.call_count == 2
+
+
 def test_capitalize_str() -> None:
     test_strings = [
         ("test title", "Test Title"),
@@ -0,0 +1,92 @@
+import datetime
+import io
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from brainrefresh.utils import parsers, renderers
+from brainrefresh.utils.parsers import ORJSONParser
+from brainrefresh.utils.renderers import ORJSONRenderer
+
+DATA = OrderedDict(
+    [
+        ("limit", 20),
+        ("next", None),
+        (
+            "results",
+            [
+                {
+                    "uuid": uuid.UUID("2f8a6c1e-5b7d-4c1a-9f3e-0d2b4a6c8e10"),
+                    "created_at": datetime.datetime(
+                        2023, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+                    ),
+                    "updated_at": timezone.make_aware(
+                        datetime.datetime(2023, 1, 2),
+                        datetime.timezone(datetime.timedelta(hours=3)),
+                    ),
+                    "date": datetime.date(2023, 1, 2),
+                    "score": Decimal("1.50"),
+                    "label": _("Tag"),
+                    "title": "Вопрос\u2028с переносом",
+                    "ids": {1: "one"},
+                    "float": 0.1,
+                }
+            ],
+        ),
+    ]
+)
+
+
+def test_render_matches_json_renderer():
+    assert ORJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_render_none():
+    assert ORJSONRenderer().render(None) == b""
+
+
+def test_render_indent_falls_back():
+    media_type = "application/json; indent=4"
+    expected = JSONRenderer().render(DATA, media_type)
+    assert ORJSONRenderer().render(DATA, media_type) == expected
+
+
+def test_render_without_orjson():
+    with mock.patch.object(renderers, "orjson", None):
+        assert ORJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_render_big_int_falls_back():
+    data = {"count": 2**64}
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_render_nan():
+    # strict JSONRenderer refuses NaN, orjson renders it as null
+    data = {"score": float("nan"), "max": float("inf")}
+    with pytest.raises(ValueError):
+        JSONRenderer().render(data)
+    assert ORJSONRenderer().render(data) == b'{"score":null,"max":null}'
+
+
+def test_parse():
+    stream = io.BytesIO('{"title": "Вопрос", "tags": [1, 2]}'.encode())
+    assert ORJSONParser().parse(stream) == {"title": "Вопрос", "tags": [1, 2]}
+
+
+def test_parse_without_orjson():
+    stream = io.BytesIO(b'{"title": "a"}')
+    with mock.patch.object(parsers, "orjson", None):
+        assert ORJSONParser().parse(stream) == {"title": "a"}
+
+
+def test_parse_error():
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(b"{invalid"))
@@ -3,8 +3,11 @@ from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from brainrefresh.questions.api.views import (
     AnswerViewSet,
+    CacheStatsViewSet,
     ChoiceViewSet,
+    QuestionImportViewSet,
     QuestionViewSet,
+    ReviewViewSet,
     TagViewSet,
 )
 from brainrefresh.users.api.views import UserViewSet
@@ -16,9 +19,12 @@ else:
 
 router.register("users", UserViewSet)
 router.register("tags", TagViewSet, basename="tag")
+router.register("question-imports", QuestionImportViewSet, basename="question-import")
 router.register("questions", QuestionViewSet, basename="question")
 router.register("choices", ChoiceViewSet, basename="choice")
 router.register("answers", AnswerViewSet, basename="answer")
+router.register("reviews", ReviewViewSet, basename="review")
+router.register("cache-stats", CacheStatsViewSet, basename="cache-stats")
 
 app_name = "api"
 urlpatterns = router.urls
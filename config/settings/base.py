@@ -26,6 +26,9 @@ DEBUG = env.bool("DJANGO_DEBUG", False)
 TIME_ZONE = "Europe/Moscow"
 # https://docs.djangoproject.com/en/dev/ref/settings/#language-code
 LANGUAGE_CODE = "en-us"
+# https://docs.djangoproject.com/en/dev/ref/settings/#languages
+# cached API pages are stored and warmed per language
+LANGUAGES = [("en", "English"), ("ru", "Russian")]
 # https://docs.djangoproject.com/en/dev/ref/settings/#site-id
 SITE_ID = 1
 # https://docs.djangoproject.com/en/dev/ref/settings/#use-i18n
@@ -61,6 +64,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -317,6 +321,15 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.TokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAdminUser",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "brainrefresh.utils.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "brainrefresh.utils.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -335,6 +348,22 @@ SPECTACULAR_SETTINGS = {
 # CACHES
 # ------------------------------------------------------------------------------
 API_CACHE_TIME = env("API_CACHE_TIME", default=60 * 60)  # cache api for n seconds
+# pages kept in memory of every process, 0 disables
+API_LOCAL_CACHE_SIZE = env.int("API_LOCAL_CACHE_SIZE", default=256)
+# pages re-rendered after invalidations, by the beat schedule and `warm_cache`,
+# a JSON list as paths may contain commas, e.g. '["/api/questions/?tags=a,b"]'
+API_CACHE_WARM_PATHS = env.json(
+    "API_CACHE_WARM_PATHS",
+    default=[
+        "/api/tags/",
+        # first page of the frontend question list
+        "/api/questions/?limit=10",
+        "/api/questions/?language=EN",
+        "/api/questions/?language=RU",
+    ],
+)
+# seconds between an invalidation and re-rendering, 0 disables
+API_CACHE_WARM_DELAY = env.int("API_CACHE_WARM_DELAY", default=5)
 
 # Your stuff...
 # ------------------------------------------------------------------------------
@@ -38,3 +38,4 @@ CACHES = {
         "LOCATION": "",
     }
 }
+API_CACHE_WARM_DELAY = 0